@@ -2,13 +2,21 @@ import os
 import asyncio
 import re
 import json
+import orjson
 import argparse
 import sys
-import matplotlib.pyplot as plt
+import matplotlib
+matplotlib.use("Agg")  # Non-interactive backend; reports are rendered straight to files
+from matplotlib import colormaps
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.lines import Line2D
 import datetime
 from datetime import datetime
 from dotenv import load_dotenv
 from agents import Agent, Runner
+from openai.types.responses import ResponseTextDeltaEvent
+from env_config import env_number
 from typing import List, Dict, Any, Tuple, Optional, Union, Set
 import csv
 import numpy as np 
@@ -40,6 +48,69 @@ console = Console()
 # Load environment variables from .env file
 load_dotenv()
 
+# Resolution of the report charts; markdown reports don't need print-quality 300 dpi PNGs,
+# whose encoding time and file size grow with the pixel count
+CHART_DPI = env_number("FOCUS_GROUP_CHART_DPI", 120, minimum=30, maximum=1200)
+
+# Simulation outputs live under <FOCUS_GROUP_OUTPUT_ROOT>/<simulation_id>, which the UI serves from its public/ folder
+# Assumes the script is run from the root of the openai-agents-simulation directory
+FOCUS_GROUP_OUTPUT_ROOT = os.path.join("openai-simulations-ui", "public", "simulations", "focus-group")
+
+# Fenced ```json block emitted by the persona generator
+_JSON_FENCE_RE = re.compile(r'```json\s*(.*?)\s*```', re.DOTALL)
+
+# Characters that matter when checking bracket balance; everything else is skipped over
+_JSON_STRUCTURE_RE = re.compile(r'["\\{}\[\]]')
+
+def _is_balanced_json(body: str) -> bool:
+    """
+    True if body is a single {...} or [...] value whose brackets balance, ignoring brackets inside
+    strings. A cheap linear check that rules out truncated or prose-filled blocks before parsing.
+    """
+    if not body or body[0] not in "{[":
+        return False
+    depth = 0
+    in_string = False
+    skip_to = 0 # Position after an escaped character inside a string
+    for match in _JSON_STRUCTURE_RE.finditer(body):
+        pos = match.start()
+        if pos < skip_to:
+            continue
+        char = match.group()
+        if in_string:
+            if char == "\\":
+                skip_to = pos + 2
+            elif char == '"':
+                in_string = False
+        elif char == '"':
+            in_string = True
+        elif char in "{[":
+            depth += 1
+        elif char in "}]":
+            depth -= 1
+            if depth == 0:
+                return pos == len(body) - 1
+    return False
+
+def _last_json_fence(text: str) -> Optional[Tuple[int, int, str]]:
+    """
+    Locates the last complete ```json fenced block as (start, end, body). The analyst puts its JSON
+    at the end of a long report, so this searches back from the tail with plain string scans,
+    stepping past unterminated or unbalanced fences to the previous one.
+    """
+    search_end = len(text)
+    while True:
+        start = text.rfind("```json", 0, search_end)
+        if start == -1:
+            return None
+        body_start = start + len("```json")
+        end = text.find("```", body_start)
+        if end != -1:
+            body = text[body_start:end].strip()
+            if _is_balanced_json(body):
+                return start, end + 3, body
+        search_end = start
+
 # --- Pydantic Models for Data Validation ---
 
 class Demographics(BaseModel):
@@ -173,9 +244,9 @@ class AnalysisData(BaseModel):
         """Safely parse JSON string to AnalysisData object."""
         try:
             # Find JSON block in the analyst output
-            json_match = re.search(r'```json\s*(.*?)\s*```', json_str, re.DOTALL)
-            if json_match:
-                data_dict = json.loads(json_match.group(1))
+            json_fence = _last_json_fence(json_str)
+            if json_fence:
+                data_dict = orjson.loads(json_fence[2])
                 return cls(**data_dict)
             else:
                 raise ValueError("No JSON block found in analyst output")
@@ -189,20 +260,13 @@ class AnalysisData(BaseModel):
                 engagement_metrics={}
             )
 
-# --- Agent Definitions ---
+# --- Static Agent Instructions ---
+# Kept free of per-run values so every call starts with a byte-identical prefix,
+# which lets the provider's prompt cache reuse it. Per-run details are appended last.
 
-class ModeratorAgent(Agent):
-    """
-    Guides the focus group discussion, poses questions, manages flow,
-    and ensures all participants contribute.
-    """
-    def __init__(self, topic: str, participant_profiles: List[PersonaProfile], num_rounds: int = 3):
-        super().__init__(
-            name="Focus Group Moderator",
-            instructions=f"""You are an expert focus group moderator with over 15 years of experience.
-Your goal is to facilitate a productive discussion on the topic: '{topic}'.
-You need to guide the conversation among participants with the following profiles:
-{[p.get_summary() for p in participant_profiles]}
+MODERATOR_STATIC_INSTRUCTIONS = """You are an expert focus group moderator with over 15 years of experience.
+Your goal is to facilitate a productive discussion on the topic given in the SESSION DETAILS below,
+guiding the conversation among the participants profiled there.
 
 MODERATION APPROACH:
 - Start with a warm welcome and clear introduction of the topic
@@ -219,13 +283,85 @@ MODERATION APPROACH:
 - End with final thoughts from each participant and a clear conclusion
 
 Ensure the discussion stays on topic and delve deeper into interesting points.
-Manage the flow over approximately {num_rounds} rounds of interaction.
+Manage the flow over the number of rounds given in the SESSION DETAILS.
 Start by introducing the topic and asking an initial question.
 In subsequent rounds, synthesize previous points and pose follow-up questions.
-Address participants by their real names (e.g., '{participant_profiles[0].name if participant_profiles else "John"}').
+Address participants by their real names.
 Conclude the session by thanking participants and summarizing key insights.
 
-Your output should be ONLY your dialogue as the moderator.""",
+Your output should be ONLY your dialogue as the moderator."""
+
+ANALYST_STATIC_INSTRUCTIONS = """You are a senior market research analyst with expertise in qualitative research methodology.
+You have been provided with a transcript of a focus group discussion on the topic given in the STUDY DETAILS below, with the target audience given there.
+Your task is to perform a deep analysis of this transcript and generate a comprehensive report that meets professional standards.
+
+**YOU MUST CALCULATE ALL METRICS BASED ON YOUR ANALYSIS:** You must analyze the sentiment of each statement in the transcript to determine whether it is positive, neutral, or negative. Calculate actual percentages based on your analysis - do not use placeholder or arbitrary values.
+
+The report should include:
+1.  **Executive Summary:** A concise overview of the key findings (approx. 150 words).
+2.  **Research Background:** Brief context on the study purpose, topic, and target audience.
+3.  **Methodology:** Brief description of the focus group simulation approach.
+4.  **Participant Overview:** Summary of participant profiles/personas and how they represent the target audience.
+5.  **Key Themes:** Identify and elaborate on the major recurring themes, ideas, and opinions expressed. 
+    - Calculate theme frequency/prominence based on your analysis.
+    - Include representative direct quotes for each theme (with attribution).
+    - Note areas of consensus and disagreement.
+6.  **Sentiment Analysis:** Assess the overall sentiment towards the topic and specific aspects discussed, based *directly on your analysis of the transcript*.
+    - Calculate and report the sentiment distribution (positive, negative, neutral percentages).
+    - Analyze how sentiment varies by participant persona characteristics.
+    - Identify sentiment trends or shifts during the discussion.
+7.  **Participant Dynamics:** Analyze interaction patterns, influence, and engagement levels.
+8.  **Actionable Insights & Recommendations:** Translate the findings into strategic insights and actionable recommendations relevant to the focus group's topic.
+9.  **Potential Biases/Limitations:** Acknowledge any potential biases observed or limitations of the simulation.
+10. **Appendix:** Suggestions for follow-up research.
+
+Structure your output clearly using markdown headings. Ensure the analysis is objective, insightful, and presented professionally, as expected from a top-tier research firm.
+
+AFTER YOUR ANALYSIS, include a JSON-formatted section with structured data derived *from your analysis* for visualization. This must be valid, properly escaped JSON:
+
+```json
+{
+  "sentiment_breakdown": {
+    "positive": <calculated_positive_percentage>,
+    "neutral": <calculated_neutral_percentage>,
+    "negative": <calculated_negative_percentage>
+  },
+  "key_themes": [
+    {"theme": "<Identified Theme 1>", "frequency": <calculated_frequency_1>, "description": "<Brief theme description>"},
+    {"theme": "<Identified Theme 2>", "frequency": <calculated_frequency_2>, "description": "<Brief theme description>"}
+    // Add more themes as identified
+  ],
+  "participant_sentiment": {
+    "Participant_1": {"positive": <p1_positive_%>, "neutral": <p1_neutral_%>, "negative": <p1_negative_%>, "name": "<Persona 1 Name>"},
+    "Participant_2": {"positive": <p2_positive_%>, "neutral": <p2_neutral_%>, "negative": <p2_negative_%>, "name": "<Persona 2 Name>"}
+    // Add all participants analyzed
+  },
+  "engagement_metrics": {
+    "Participant_1": {"word_count": <p1_word_count>, "response_count": <p1_response_count>, "interaction_score": <calculated_p1_score>},
+    "Participant_2": {"word_count": <p2_word_count>, "response_count": <p2_response_count>, "interaction_score": <calculated_p2_score>}
+     // Add all participants analyzed
+  }
+}
+```
+
+**Crucially, you must actively analyze the transcript to generate these values - do not use placeholder values.** Calculate word counts from the text, derive sentiment scores by analyzing the content of each statement, and determine theme frequencies based on topic occurrences."""
+
+# --- Agent Definitions ---
+
+class ModeratorAgent(Agent):
+    """
+    Guides the focus group discussion, poses questions, manages flow,
+    and ensures all participants contribute.
+    """
+    def __init__(self, topic: str, participant_profiles: List[PersonaProfile], num_rounds: int = 3):
+        super().__init__(
+            name="Focus Group Moderator",
+            instructions=f"""{MODERATOR_STATIC_INSTRUCTIONS}
+
+SESSION DETAILS:
+- Topic: '{topic}'
+- Rounds of interaction: approximately {num_rounds}
+- Participants: {[p.get_summary() for p in participant_profiles]}""",
             model= "gpt-4o" 
         )
         self.topic = topic
@@ -271,60 +407,11 @@ class AnalystAgent(Agent):
     def __init__(self, topic: str, target_audience: str):
         super().__init__(
             name="Focus Group Analyst",
-            instructions=f"""You are a senior market research analyst with expertise in qualitative research methodology.
-You have been provided with a transcript of a focus group discussion on '{topic}' with target audience: '{target_audience}'.
-Your task is to perform a deep analysis of this transcript and generate a comprehensive report that meets professional standards.
-
-**YOU MUST CALCULATE ALL METRICS BASED ON YOUR ANALYSIS:** You must analyze the sentiment of each statement in the transcript to determine whether it is positive, neutral, or negative. Calculate actual percentages based on your analysis - do not use placeholder or arbitrary values.
-
-The report should include:
-1.  **Executive Summary:** A concise overview of the key findings (approx. 150 words).
-2.  **Research Background:** Brief context on the study purpose, topic, and target audience.
-3.  **Methodology:** Brief description of the focus group simulation approach.
-4.  **Participant Overview:** Summary of participant profiles/personas and how they represent the target audience.
-5.  **Key Themes:** Identify and elaborate on the major recurring themes, ideas, and opinions expressed. 
-    - Calculate theme frequency/prominence based on your analysis.
-    - Include representative direct quotes for each theme (with attribution).
-    - Note areas of consensus and disagreement.
-6.  **Sentiment Analysis:** Assess the overall sentiment towards the topic and specific aspects discussed, based *directly on your analysis of the transcript*.
-    - Calculate and report the sentiment distribution (positive, negative, neutral percentages).
-    - Analyze how sentiment varies by participant persona characteristics.
-    - Identify sentiment trends or shifts during the discussion.
-7.  **Participant Dynamics:** Analyze interaction patterns, influence, and engagement levels.
-8.  **Actionable Insights & Recommendations:** Translate the findings into strategic insights and actionable recommendations relevant to the focus group's topic.
-9.  **Potential Biases/Limitations:** Acknowledge any potential biases observed or limitations of the simulation.
-10. **Appendix:** Suggestions for follow-up research.
+            instructions=f"""{ANALYST_STATIC_INSTRUCTIONS}
 
-Structure your output clearly using markdown headings. Ensure the analysis is objective, insightful, and presented professionally, as expected from a top-tier research firm.
-
-AFTER YOUR ANALYSIS, include a JSON-formatted section with structured data derived *from your analysis* for visualization. This must be valid, properly escaped JSON:
-
-```json
-{{
-  "sentiment_breakdown": {{
-    "positive": <calculated_positive_percentage>,
-    "neutral": <calculated_neutral_percentage>,
-    "negative": <calculated_negative_percentage>
-  }},
-  "key_themes": [
-    {{"theme": "<Identified Theme 1>", "frequency": <calculated_frequency_1>, "description": "<Brief theme description>"}},
-    {{"theme": "<Identified Theme 2>", "frequency": <calculated_frequency_2>, "description": "<Brief theme description>"}}
-    // Add more themes as identified
-  ],
-  "participant_sentiment": {{
-    "Participant_1": {{"positive": <p1_positive_%>, "neutral": <p1_neutral_%>, "negative": <p1_negative_%>, "name": "<Persona 1 Name>"}},
-    "Participant_2": {{"positive": <p2_positive_%>, "neutral": <p2_neutral_%>, "negative": <p2_negative_%>, "name": "<Persona 2 Name>"}}
-    // Add all participants analyzed
-  }},
-  "engagement_metrics": {{
-    "Participant_1": {{"word_count": <p1_word_count>, "response_count": <p1_response_count>, "interaction_score": <calculated_p1_score>}},
-    "Participant_2": {{"word_count": <p2_word_count>, "response_count": <p2_response_count>, "interaction_score": <calculated_p2_score>}}
-     // Add all participants analyzed
-  }}
-}}
-```
-
-**Crucially, you must actively analyze the transcript to generate these values - do not use placeholder values.** Calculate word counts from the text, derive sentiment scores by analyzing the content of each statement, and determine theme frequencies based on topic occurrences.""",
+STUDY DETAILS:
+- Topic: '{topic}'
+- Target audience: '{target_audience}'""",
             model="gpt-4o" 
         )
         self.topic = topic
@@ -332,6 +419,47 @@ AFTER YOUR ANALYSIS, include a JSON-formatted section with structured data deriv
 
 # --- Core Functions ---
 
+def _polarity_scores(polarity: float) -> Tuple[float, float, float]:
+    """Maps a TextBlob polarity (-1..1) to (positive, neutral, negative) shares summing to 1."""
+    if polarity > 0.1:
+        pos = 0.5 + (polarity * 0.5)  # Scale to 0.5-1.0
+        return pos, 1.0 - pos, 0.0
+    if polarity < -0.1:
+        neg = 0.5 + (abs(polarity) * 0.5)  # Scale to 0.5-1.0
+        return 0.0, 1.0 - neg, neg
+    pos = (polarity + 0.1) * 5  # Scale to 0-0.5
+    neg = (abs(polarity - 0.1)) * 5  # Scale to 0-0.5
+    return pos, 1.0 - (pos + neg), neg
+
+def _ensure_dir(path: str) -> None:
+    """Creates path if needed; on reruns it already exists, which a single stat confirms."""
+    if not os.path.isdir(path):
+        os.makedirs(path, exist_ok=True)
+
+def _save_personas(path: str, persona_dicts: List[Dict[str, Any]]) -> None:
+    """Writes the generated personas as indented JSON, creating the output folder if needed."""
+    _ensure_dir(os.path.dirname(path))
+    with open(path, "wb") as f:
+        f.write(orjson.dumps(persona_dicts, option=orjson.OPT_INDENT_2))
+
+def _write_report(path: str, report_parts: List[str]) -> None:
+    with open(path, "w", encoding='utf-8') as f:
+        f.writelines(report_parts)
+
+def _write_transcript_csv(path: str, transcript: List[DialogueEntry]) -> None:
+    """Writes the transcript as CSV, creating the output folder if needed."""
+    _ensure_dir(os.path.dirname(path))
+    with open(path, "w", newline='', encoding='utf-8', buffering=1 << 16) as f:
+        writer = csv.writer(f)
+        writer.writerow(["Speaker ID", "Speaker Name", "Dialogue", "Timestamp"])
+        writer.writerows((entry.speaker_id, entry.speaker_name, entry.content, entry.timestamp) for entry in transcript)
+    console.log(f"[green]Transcript saved successfully as: {path}")
+
+def _start_transcript_csv(simulation_id: str, transcript: List[DialogueEntry]) -> asyncio.Task:
+    """Starts writing the simulation's transcript CSV in a worker thread and returns the task to await."""
+    path = os.path.join(FOCUS_GROUP_OUTPUT_ROOT, simulation_id, "transcript.csv")
+    return asyncio.create_task(asyncio.to_thread(_write_transcript_csv, path, transcript))
+
 @retry(
     stop=stop_after_attempt(3),
     wait=wait_exponential(multiplier=1, min=2, max=10),
@@ -393,7 +521,7 @@ Based on the target audience description: '{target_audience}', generate {num_par
         result = await Runner.run(persona_generator_agent, f"Generate {num_participants} detailed personas for topic '{topic}' and audience '{target_audience}'.")
         
         # Extract JSON from the agent output
-        json_match = re.search(r'```json\s*(.*?)\s*```', result.final_output, re.DOTALL)
+        json_match = _JSON_FENCE_RE.search(result.final_output)
         if json_match:
             persona_json = json_match.group(1)
         else:
@@ -401,7 +529,7 @@ Based on the target audience description: '{target_audience}', generate {num_par
             persona_json = result.final_output
             
         # Parse JSON into raw dictionaries
-        raw_personas = json.loads(persona_json)
+        raw_personas = orjson.loads(persona_json)
         
         # Validate and convert to Pydantic models
         personas = []
@@ -437,13 +565,9 @@ Based on the target audience description: '{target_audience}', generate {num_par
         # Create a timestamp for the personas file
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         
-        # Save personas to a file for reference
-        os.makedirs("output_data", exist_ok=True)
-        
-        # Save as JSON for reference
+        # Save personas as JSON for reference, off the event loop
         persona_dicts = [p.model_dump() for p in personas]
-        with open(f"output_data/personas_{timestamp}.json", "w") as f:
-            json.dump(persona_dicts, f, indent=2)
+        await asyncio.to_thread(_save_personas, f"output_data/personas_{timestamp}.json", persona_dicts)
             
         return personas[:num_participants]  # Return only the requested number
         
@@ -483,19 +607,59 @@ async def create_participant_agents(target_audience: str, num_participants: int,
 
     return participants, participant_profiles_for_moderator
 
+async def _stream_turn(agent: Agent, prompt: str, stream_label: str, echo_until: Optional[str] = None) -> str:
+    """
+    Runs one discussion turn with the streaming API and forwards the reply to the UI as it is
+    generated, flushed a whole line at a time since the UI tails stdout line by line.
+    If echo_until is given, forwarding stops where that marker appears; the full reply is still returned.
+    """
+    pending = [f"STREAM: {stream_label}: "]
+    echoing = True
+
+    def emit(text: str) -> None:
+        nonlocal echoing
+        if echo_until:
+            cut = text.find(echo_until)
+            if cut != -1:
+                text = text[:cut]
+                echoing = False
+        print(text, flush=True)
+
+    result = Runner.run_streamed(agent, prompt)
+    async for event in result.stream_events():
+        if not echoing or event.type != "raw_response_event" or not isinstance(event.data, ResponseTextDeltaEvent):
+            continue
+        delta = event.data.delta
+        if "\n" not in delta:
+            pending.append(delta)
+            continue
+        head, _, tail = delta.rpartition("\n")
+        pending.append(head)
+        emit("".join(pending))
+        pending[:] = [tail]
+    if echoing:
+        emit("".join(pending))
+    return result.final_output
+
+def _record_turn(transcript: List[DialogueEntry], context_parts: List[str], speaker_id: str,
+                 speaker_name: str, context_label: str, content: str) -> None:
+    """Adds a turn to the transcript and to the running discussion context in one place."""
+    transcript.append(DialogueEntry(speaker_id=speaker_id, speaker_name=speaker_name, content=content))
+    context_parts.append(f"{context_label}: {content}")
+
 async def run_simulation(moderator: ModeratorAgent, participants: List[ParticipantAgent], num_rounds: int) -> List[DialogueEntry]:
     """Runs the focus group simulation loop with enhanced error handling and real-name streaming."""
     console.log("[bold green]\n--- Starting Focus Group Simulation ---[/bold green]")
     # Also send to stream for UI
     print(f"STREAM: --- Starting Focus Group Simulation ---")
     transcript = []
-    current_context = f"The discussion topic is: {moderator.topic}"
+    # Context is kept as a list of lines and joined per prompt, avoiding repeated string concatenation
+    context_parts = [f"The discussion topic is: {moderator.topic}"]
     
     # Add participant intros to the context with real names
     for participant in participants:
         profile = participant.persona_profile
-        intro = f"{participant.persona_id} is {profile.name}, {profile.age}, {profile.occupation}."
-        current_context += f"\n{intro}"
+        context_parts.append(f"{participant.persona_id} is {profile.name}, {profile.age}, {profile.occupation}.")
     
     for round_num in range(1, num_rounds + 1):
         console.log(f"[bold cyan]\n--- Round {round_num} ---[/bold cyan]")
@@ -505,6 +669,7 @@ async def run_simulation(moderator: ModeratorAgent, participants: List[Participa
         # Moderator's turn
         console.log("[yellow]Moderator is thinking...[/yellow]")
         print(f"STREAM: Moderator is thinking...")
+        current_context = "\n".join(context_parts)
         moderator_prompt = f"""Current context:
 {current_context}
 
@@ -528,32 +693,18 @@ This is the final round of the discussion. Ask a closing question that helps sum
 Make sure to give each participant an opportunity to share any final insights they haven't expressed yet."""
 
         try:
-            mod_result = await Runner.run(moderator, moderator_prompt)
-            moderator_dialogue = mod_result.final_output
-            dialogue_entry = DialogueEntry(
-                speaker_id="Moderator",
-                speaker_name="Moderator",
-                content=moderator_dialogue
-            )
+            # Streamed to the UI while it is generated
+            moderator_dialogue = await _stream_turn(moderator, moderator_prompt, "Moderator")
             console.print(f"[bold magenta]Moderator:[/bold magenta] {moderator_dialogue}")
-            # Stream to UI
-            print(f"STREAM: Moderator: {moderator_dialogue}")
-            transcript.append(dialogue_entry)
-            current_context += f"\nModerator: {moderator_dialogue}"
+            _record_turn(transcript, context_parts, "Moderator", "Moderator", "Moderator", moderator_dialogue)
         except Exception as e:
             logger.error(f"Error in moderator response: {e}")
             # Create a fallback response
             fallback_msg = f"Let's move forward with our discussion on {moderator.topic}. What are your thoughts on this?"
-            dialogue_entry = DialogueEntry(
-                speaker_id="Moderator",
-                speaker_name="Moderator",
-                content=fallback_msg
-            )
             console.print(f"[bold red]Error with moderator. Using fallback:[/bold red] {fallback_msg}")
             # Stream fallback to UI
             print(f"STREAM: Moderator: {fallback_msg}")
-            transcript.append(dialogue_entry)
-            current_context += f"\nModerator: {fallback_msg}"
+            _record_turn(transcript, context_parts, "Moderator", "Moderator", "Moderator", fallback_msg)
 
         # Participants' turn (sequential response for simplicity, parallel to be added)
         for participant in participants:
@@ -573,6 +724,7 @@ Your education: {profile.education or 'Not specified'}
 Your income level: {profile.income_bracket or 'Not specified'}
 """
             
+            current_context = "\n".join(context_parts)
             participant_prompt = f"""Current context:
 {current_context}
 
@@ -583,32 +735,20 @@ Be authentic to your character's viewpoint and life experiences.
 If other participants have spoken, consider responding to or building upon their points if relevant."""
 
             try:
-                part_result = await Runner.run(participant, participant_prompt)
-                participant_dialogue = part_result.final_output
-                dialogue_entry = DialogueEntry(
-                    speaker_id=participant.persona_id,
-                    speaker_name=profile.name,
-                    content=participant_dialogue
-                )
+                # Streamed to the UI while it is generated
+                participant_dialogue = await _stream_turn(participant, participant_prompt, f"{profile.name} ({participant.persona_id})")
                 console.print(f"[bold blue]{profile.name} ({participant.persona_id}):[/bold blue] {participant_dialogue}")
-                # Stream to UI
-                print(f"STREAM: {profile.name} ({participant.persona_id}): {participant_dialogue}")
-                transcript.append(dialogue_entry)
-                current_context += f"\n{participant.persona_id} ({profile.name}): {participant_dialogue}"
+                _record_turn(transcript, context_parts, participant.persona_id, profile.name,
+                             f"{participant.persona_id} ({profile.name})", participant_dialogue)
             except Exception as e:
                 logger.error(f"Error in participant {participant.persona_id} response: {e}")
                 # Create a fallback response
                 fallback_msg = f"I'm interested in this topic from my perspective as {profile.occupation}."
-                dialogue_entry = DialogueEntry(
-                    speaker_id=participant.persona_id,
-                    speaker_name=profile.name,
-                    content=fallback_msg
-                )
                 console.print(f"[bold red]Error with {participant.persona_id}. Using fallback:[/bold red] {fallback_msg}")
                 # Stream fallback to UI
                 print(f"STREAM: {profile.name} ({participant.persona_id}): {fallback_msg}")
-                transcript.append(dialogue_entry)
-                current_context += f"\n{participant.persona_id} ({profile.name}): {fallback_msg}"
+                _record_turn(transcript, context_parts, participant.persona_id, profile.name,
+                             f"{participant.persona_id} ({profile.name})", fallback_msg)
                 
             await asyncio.sleep(0.5) # Small delay to mimic turn-taking and avoid rate limits
 
@@ -618,36 +758,25 @@ If other participants have spoken, consider responding to or building upon their
     console.log("[yellow]Moderator is thinking...[/yellow]")
     print(f"STREAM: Moderator is thinking...")
     
+    current_context = "\n".join(context_parts)
     try:
-        mod_result = await Runner.run(moderator, f"""Current context:
+        # Streamed to the UI while it is generated
+        moderator_dialogue = await _stream_turn(moderator, f"""Current context:
 {current_context}
 
 Conclude the focus group session. Thank the participants for their time and valuable insights.
 Provide a brief summary of the key points discussed and the diverse perspectives shared.
-End on a positive and appreciative note.""")
-        moderator_dialogue = mod_result.final_output
-        dialogue_entry = DialogueEntry(
-            speaker_id="Moderator",
-            speaker_name="Moderator",
-            content=moderator_dialogue
-        )
+End on a positive and appreciative note.""", "Moderator")
         console.print(f"[bold magenta]Moderator:[/bold magenta] {moderator_dialogue}")
-        # Stream to UI
-        print(f"STREAM: Moderator: {moderator_dialogue}")
-        transcript.append(dialogue_entry)
+        _record_turn(transcript, context_parts, "Moderator", "Moderator", "Moderator", moderator_dialogue)
     except Exception as e:
         logger.error(f"Error in moderator conclusion: {e}")
         # Create a fallback conclusion
         fallback_msg = "Thank you all for your participation and valuable insights. This concludes our focus group session."
-        dialogue_entry = DialogueEntry(
-            speaker_id="Moderator",
-            speaker_name="Moderator",
-            content=fallback_msg
-        )
         console.print(f"[bold red]Error with moderator conclusion. Using fallback:[/bold red] {fallback_msg}")
         # Stream fallback to UI
         print(f"STREAM: Moderator: {fallback_msg}")
-        transcript.append(dialogue_entry)
+        _record_turn(transcript, context_parts, "Moderator", "Moderator", "Moderator", fallback_msg)
 
     console.log("[bold green]\n--- Simulation Finished ---[/bold green]")
     print(f"STREAM: --- Simulation Finished ---")
@@ -667,6 +796,8 @@ async def analyze_transcript(analyst: AnalystAgent, transcript: List[DialogueEnt
     word_counts = {}
     response_counts = {}
     interaction_map = {}  # For the knowledge graph
+    speaker_texts = {}  # Each speaker's statements, grouped once for the per-participant sentiment fallbacks
+    recent_entries = transcript[-10:][::-1]  # Same window for every entry, so slice it once
     
     for entry in transcript:
         speaker_id = entry.speaker_id
@@ -678,15 +809,17 @@ async def analyze_transcript(analyst: AnalystAgent, transcript: List[DialogueEnt
             word_counts[speaker_id] = 0
             response_counts[speaker_id] = 0
             interaction_map[speaker_id] = set()
+            speaker_texts[speaker_id] = []
             
         word_counts[speaker_id] += len(content.split())
+        speaker_texts[speaker_id].append(content)
         response_counts[speaker_id] += 1
         
         # Track who is potentially responding to whom for interaction graph
         # This is a simple heuristic - next:  NLP to detect replies
         if speaker_id != "Moderator":
             # 
-            for prev_entry in reversed(transcript[-10:]):  # Look at recent entries
+            for prev_entry in recent_entries:  # Look at recent entries
                 if prev_entry.speaker_id != speaker_id:
                     interaction_map[speaker_id].add(prev_entry.speaker_id)
                     if prev_entry.speaker_id in interaction_map:
@@ -705,9 +838,8 @@ async def analyze_transcript(analyst: AnalystAgent, transcript: List[DialogueEnt
     full_transcript = "\n".join(formatted_transcript)
     
     # Create context on participants for the analysis
-    participant_context = "Participant Information:\n"
-    for pid, profile in participant_info.items():
-        participant_context += f"{pid}: {profile.name}, {profile.age}, {profile.occupation}\n"
+    participant_context = "Participant Information:\n" + "".join(
+        f"{pid}: {profile.name}, {profile.age}, {profile.occupation}\n" for pid, profile in participant_info.items())
     
     analysis_prompt = f"""Analyze the following focus group transcript:
 
@@ -728,8 +860,8 @@ You MUST calculate sentiment scores by analyzing the content of each statement.
     print(f"STREAM: Performing in-depth analysis of focus group transcript...")
     
     try:
-        result = await Runner.run(analyst, analysis_prompt)
-        analysis = result.final_output
+        # Stream the written analysis to the UI as it is generated; the trailing JSON block is for the charts only
+        analysis = await _stream_turn(analyst, analysis_prompt, "Analyst", echo_until="```json")
         
         # Extract JSON data for visualization and convert to Pydantic model
         logger.info("Extracting visualization data...")
@@ -759,23 +891,8 @@ You MUST calculate sentiment scores by analyzing the content of each statement.
         for pid, profile in participant_info.items():
             if pid not in analysis_data.participant_sentiment:
                 # Use TextBlob to calculate sentiment as a fallback
-                participant_text = " ".join([entry.content for entry in transcript if entry.speaker_id == pid])
-                blob = TextBlob(participant_text)
-                sentiment_polarity = blob.sentiment.polarity
-                
-                # Convert polarity to positive/neutral/negative percentages
-                if sentiment_polarity > 0.1:
-                    pos = 0.5 + (sentiment_polarity * 0.5)  # Scale to 0.5-1.0
-                    neu = 1.0 - pos
-                    neg = 0.0
-                elif sentiment_polarity < -0.1:
-                    neg = 0.5 + (abs(sentiment_polarity) * 0.5)  # Scale to 0.5-1.0
-                    neu = 1.0 - neg
-                    pos = 0.0
-                else:
-                    pos = (sentiment_polarity + 0.1) * 5  # Scale to 0-0.5
-                    neg = (abs(sentiment_polarity - 0.1)) * 5  # Scale to 0-0.5
-                    neu = 1.0 - (pos + neg)
+                participant_text = " ".join(speaker_texts.get(pid, ()))
+                pos, neu, neg = _polarity_scores(TextBlob(participant_text).sentiment.polarity)
                     
                 analysis_data.participant_sentiment[pid] = ParticipantSentiment(
                     positive=pos,
@@ -785,9 +902,9 @@ You MUST calculate sentiment scores by analyzing the content of each statement.
                 )
         
         # Remove JSON section from the analysis text
-        json_match = re.search(r'```json\s*(.*?)\s*```', analysis, re.DOTALL)
-        if json_match:
-            analysis = analysis.replace(json_match.group(0), '')
+        json_fence = _last_json_fence(analysis)
+        if json_fence:
+            analysis = analysis[:json_fence[0]] + analysis[json_fence[1]:]
             
         console.log("[green]Analysis Complete.")
         # Stream to UI
@@ -809,22 +926,7 @@ You MUST calculate sentiment scores by analyzing the content of each statement.
         
         # Calculate basic sentiment using TextBlob
         full_text = " ".join([entry.content for entry in transcript])
-        blob = TextBlob(full_text)
-        sentiment_polarity = blob.sentiment.polarity
-        
-        # Convert polarity to positive/neutral/negative percentages
-        if sentiment_polarity > 0.1:
-            pos = 0.5 + (sentiment_polarity * 0.5)  # Scale to 0.5-1.0
-            neu = 1.0 - pos
-            neg = 0.0
-        elif sentiment_polarity < -0.1:
-            neg = 0.5 + (abs(sentiment_polarity) * 0.5)  # Scale to 0.5-1.0
-            neu = 1.0 - neg
-            pos = 0.0
-        else:
-            pos = (sentiment_polarity + 0.1) * 5  # Scale to 0-0.5
-            neg = (abs(sentiment_polarity - 0.1)) * 5  # Scale to 0-0.5
-            neu = 1.0 - (pos + neg)
+        pos, neu, neg = _polarity_scores(TextBlob(full_text).sentiment.polarity)
             
         sentiment_breakdown = SentimentScore(
             positive=pos,
@@ -835,23 +937,9 @@ You MUST calculate sentiment scores by analyzing the content of each statement.
         # Process individual participant sentiment
         participant_sentiment = {}
         for pid, profile in participant_info.items():
-            participant_text = " ".join([entry.content for entry in transcript if entry.speaker_id == pid])
+            participant_text = " ".join(speaker_texts.get(pid, ()))
             if participant_text:
-                blob = TextBlob(participant_text)
-                sentiment_polarity = blob.sentiment.polarity
-                
-                if sentiment_polarity > 0.1:
-                    pos = 0.5 + (sentiment_polarity * 0.5)
-                    neu = 1.0 - pos
-                    neg = 0.0
-                elif sentiment_polarity < -0.1:
-                    neg = 0.5 + (abs(sentiment_polarity) * 0.5)
-                    neu = 1.0 - neg
-                    pos = 0.0
-                else:
-                    pos = (sentiment_polarity + 0.1) * 5
-                    neg = (abs(sentiment_polarity - 0.1)) * 5
-                    neu = 1.0 - (pos + neg)
+                pos, neu, neg = _polarity_scores(TextBlob(participant_text).sentiment.polarity)
             else:
                 pos, neu, neg = 0.33, 0.34, 0.33
                 
@@ -904,23 +992,37 @@ Further analysis is recommended to draw more specific conclusions.
         
         return fallback_analysis, analysis_data
 
-def generate_report(analysis: str, parameters: Dict[str, Any], transcript: List[DialogueEntry], 
-                   analysis_data: AnalysisData, participant_profiles: List[PersonaProfile], simulation_id: str):
-    """Generates and saves the final report with enhanced visualizations including knowledge graph."""
+def _new_figure(figsize: Tuple[float, float]) -> Tuple[Figure, Any]:
+    """Creates an Agg-backed figure and axes without registering them with pyplot's global figure manager."""
+    fig = Figure(figsize=figsize)
+    FigureCanvasAgg(fig)
+    return fig, fig.add_subplot(111)
+
+async def generate_report(analysis: str, parameters: Dict[str, Any], transcript: List[DialogueEntry], 
+                          analysis_data: AnalysisData, participant_profiles: List[PersonaProfile], simulation_id: str,
+                          csv_task: Optional[asyncio.Task] = None):
+    """
+    Generates and saves the final report with enhanced visualizations including knowledge graph.
+    File writes run in worker threads; the transcript CSV is written while the charts render,
+    unless the caller already started that write (csv_task) earlier.
+    """
     current_timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
     console.log(f"[bold green]--- Generating Report for Simulation ID: {simulation_id} ---[/bold green]")
 
     # Define the base output directory within the UI's public folder
-    # Assumes the script is run from the root of the openai-agents-simulation directory
-    base_output_dir = os.path.join("openai-simulations-ui", "public", "simulations", "focus-group", simulation_id)
+    base_output_dir = os.path.join(FOCUS_GROUP_OUTPUT_ROOT, simulation_id)
     viz_rel_path_prefix = f"/simulations/focus-group/{simulation_id}/visualizations" # Relative path for markdown links
     viz_abs_dir = os.path.join(base_output_dir, "visualizations")
 
     # Create directories if they don't exist
-    os.makedirs(viz_abs_dir, exist_ok=True)
+    await asyncio.to_thread(_ensure_dir, viz_abs_dir)
     console.log(f"[blue]Output directory created/ensured: {base_output_dir}")
+    if csv_task is None:
+        csv_task = _start_transcript_csv(simulation_id, transcript)
 
-    report_content = f"""# Focus Group Simulation Report
+    try:
+        # Report sections are collected in a list and written out together, instead of re-copying a growing string
+        report_parts = [f"""# Focus Group Simulation Report
 
 ## 1. Simulation Parameters
 - **Topic:** {parameters['topic']}
@@ -932,362 +1034,360 @@ def generate_report(analysis: str, parameters: Dict[str, Any], transcript: List[
 
 ## 2. Participant Profiles
 
-"""
-    # Add participant profiles to the report
-    for i, persona in enumerate(participant_profiles):
-        pid = f"Participant_{i+1}"
-        report_content += f"### {pid}: {persona.name}\n"
-        report_content += f"- **Age:** {persona.age}\n"
-        report_content += f"- **Occupation:** {persona.occupation}\n"
-        report_content += f"- **Education:** {persona.education or 'Unknown'}\n"
-        report_content += f"- **Demographics:** Ethnicity: {persona.demographics.ethnicity}, Marital Status: {persona.demographics.marital_status}\n"
+"""]
+        # Add participant profiles to the report
+        for i, persona in enumerate(participant_profiles):
+            pid = f"Participant_{i+1}"
+            report_parts.append(f"### {pid}: {persona.name}\n")
+            report_parts.append(f"- **Age:** {persona.age}\n")
+            report_parts.append(f"- **Occupation:** {persona.occupation}\n")
+            report_parts.append(f"- **Education:** {persona.education or 'Unknown'}\n")
+            report_parts.append(f"- **Demographics:** Ethnicity: {persona.demographics.ethnicity}, Marital Status: {persona.demographics.marital_status}\n")
         
-        # Format psychographics data
-        values_str = ", ".join(persona.psychographics.values) if persona.psychographics.values else "None specified"
-        interests_str = ", ".join(persona.psychographics.interests) if persona.psychographics.interests else "None specified"
-        report_content += f"- **Values:** {values_str}\n"
-        report_content += f"- **Interests:** {interests_str}\n\n"
+            # Format psychographics data
+            values_str = ", ".join(persona.psychographics.values) if persona.psychographics.values else "None specified"
+            interests_str = ", ".join(persona.psychographics.interests) if persona.psychographics.interests else "None specified"
+            report_parts.append(f"- **Values:** {values_str}\n")
+            report_parts.append(f"- **Interests:** {interests_str}\n\n")
     
-    report_content += f"""
+        report_parts.append(f"""
 ## 3. Analysis Results
 {analysis}
 
 ## 4. Visualizations
 *See attached visualization files referenced below*
 
-"""
+""")
     
-    # Generate visualizations from the AnalysisData
-    visualization_files = []
-    console.log(f"[yellow]Generating visualizations in {viz_abs_dir}...[/yellow]")
+        # Generate visualizations from the AnalysisData
+        visualization_files = []
+        console.log(f"[yellow]Generating visualizations in {viz_abs_dir}...[/yellow]")
         
-    try:
-        # 1. Sentiment Breakdown Pie Chart
-        plt.figure(figsize=(10, 7))
-        sentiment_data = analysis_data.sentiment_breakdown
-        labels = ['Positive', 'Neutral', 'Negative']
-        sizes = [sentiment_data.positive, sentiment_data.neutral, sentiment_data.negative]
-        colors = ['#66b3ff', '#99ff99', '#ff9999']
-        explode = (0.1, 0, 0)  # explode the 1st slice (positive)
+        try:
+            # 1. Sentiment Breakdown Pie Chart
+            fig, ax = _new_figure((10, 7))
+            sentiment_data = analysis_data.sentiment_breakdown
+            labels = ['Positive', 'Neutral', 'Negative']
+            sizes = [sentiment_data.positive, sentiment_data.neutral, sentiment_data.negative]
+            colors = ['#66b3ff', '#99ff99', '#ff9999']
+            explode = (0.1, 0, 0)  # explode the 1st slice (positive)
         
-        plt.pie(sizes, explode=explode, labels=labels, colors=colors,
-                autopct='%1.1f%%', shadow=True, startangle=140)
-        plt.axis('equal')
-        plt.title('Overall Sentiment Distribution', fontsize=16)
+            ax.pie(sizes, explode=explode, labels=labels, colors=colors,
+                   autopct='%1.1f%%', shadow=True, startangle=140)
+            ax.axis('equal')
+            ax.set_title('Overall Sentiment Distribution', fontsize=16)
         
-        pie_file = os.path.join(viz_abs_dir, "sentiment_pie_chart.png")
-        plt.savefig(pie_file, dpi=300)
-        plt.close()
-        visualization_files.append(os.path.basename(pie_file))
-        report_content += f"![Sentiment Distribution]({viz_rel_path_prefix}/sentiment_pie_chart.png)\n\n"
+            pie_file = os.path.join(viz_abs_dir, "sentiment_pie_chart.png")
+            fig.savefig(pie_file, dpi=CHART_DPI)
+            visualization_files.append(os.path.basename(pie_file))
+            report_parts.append(f"![Sentiment Distribution]({viz_rel_path_prefix}/sentiment_pie_chart.png)\n\n")
         
-        # 2. Key Themes Bar Chart
-        if analysis_data.key_themes:
-            plt.figure(figsize=(12, 8))
-            themes = [item.theme for item in analysis_data.key_themes]
-            frequencies = [item.frequency for item in analysis_data.key_themes]
+            # 2. Key Themes Bar Chart
+            if analysis_data.key_themes:
+                themes = [item.theme for item in analysis_data.key_themes]
+                frequencies = [item.frequency for item in analysis_data.key_themes]
             
-            # 
-            sns.set_style("whitegrid")
-            ax = sns.barplot(x=frequencies, y=themes, hue=themes, palette="viridis", legend=False)
+                # Style must be set before the axes are created
+                sns.set_style("whitegrid")
+                fig, ax = _new_figure((12, 8))
+                sns.barplot(x=frequencies, y=themes, hue=themes, palette="viridis", legend=False, ax=ax)
             
-            # Add data labels
-            for i, freq in enumerate(frequencies):
-                ax.text(freq + 0.05, i, f'{freq:.2f}', va='center')
+                # Add data labels
+                for i, freq in enumerate(frequencies):
+                    ax.text(freq + 0.05, i, f'{freq:.2f}', va='center')
             
-            plt.xlabel('Relative Frequency', fontsize=14)
-            plt.ylabel('Themes', fontsize=14)
-            plt.title('Key Discussion Themes', fontsize=16)
-            plt.tight_layout()
+                ax.set_xlabel('Relative Frequency', fontsize=14)
+                ax.set_ylabel('Themes', fontsize=14)
+                ax.set_title('Key Discussion Themes', fontsize=16)
+                fig.tight_layout()
             
-            themes_file = os.path.join(viz_abs_dir, "key_themes_chart.png")
-            plt.savefig(themes_file, dpi=300)
-            plt.close()
-            visualization_files.append(os.path.basename(themes_file))
-            report_content += f"![Key Themes]({viz_rel_path_prefix}/key_themes_chart.png)\n\n"
+                themes_file = os.path.join(viz_abs_dir, "key_themes_chart.png")
+                fig.savefig(themes_file, dpi=CHART_DPI)
+                visualization_files.append(os.path.basename(themes_file))
+                report_parts.append(f"![Key Themes]({viz_rel_path_prefix}/key_themes_chart.png)\n\n")
         
-        # 3. Participant Sentiment Comparison (Stacked Bar Chart)
-        if analysis_data.participant_sentiment:
-            participant_data = analysis_data.participant_sentiment
-            participants = list(participant_data.keys())
+            # 3. Participant Sentiment Comparison (Stacked Bar Chart)
+            if analysis_data.participant_sentiment:
+                participant_data = analysis_data.participant_sentiment
+                participants = list(participant_data.keys())
             
-            # Get names for display
-            participant_names = []
-            for p in participants:
-                name = participant_data[p].name
-                participant_names.append(f"{p}\n({name})")
+                # Get names for display
+                participant_names = []
+                for p in participants:
+                    name = participant_data[p].name
+                    participant_names.append(f"{p}\n({name})")
             
-            positive_values = [participant_data[p].positive for p in participants]
-            neutral_values = [participant_data[p].neutral for p in participants]
-            negative_values = [participant_data[p].negative for p in participants]
+                positive_values = [participant_data[p].positive for p in participants]
+                neutral_values = [participant_data[p].neutral for p in participants]
+                negative_values = [participant_data[p].negative for p in participants]
             
-            plt.figure(figsize=(14, 9))
+                fig, ax = _new_figure((14, 9))
             
-            # Create stacked bar chart
-            width = 0.8
-            plt.bar(participant_names, positive_values, width, label='Positive', color='#99ff99')
-            plt.bar(participant_names, neutral_values, width, bottom=positive_values, label='Neutral', color='#66b3ff')
+                # Create stacked bar chart
+                width = 0.8
+                ax.bar(participant_names, positive_values, width, label='Positive', color='#99ff99')
+                ax.bar(participant_names, neutral_values, width, bottom=positive_values, label='Neutral', color='#66b3ff')
             
-            # Calculate the bottom position for negative values
-            bottom_negative = [p + n for p, n in zip(positive_values, neutral_values)]
-            plt.bar(participant_names, negative_values, width, bottom=bottom_negative, label='Negative', color='#ff9999')
+                # Calculate the bottom position for negative values
+                bottom_negative = [p + n for p, n in zip(positive_values, neutral_values)]
+                ax.bar(participant_names, negative_values, width, bottom=bottom_negative, label='Negative', color='#ff9999')
             
-            plt.xlabel('Participants', fontsize=14)
-            plt.ylabel('Sentiment Distribution (%)', fontsize=14)
-            plt.title('Sentiment Distribution by Participant', fontsize=16)
-            plt.legend(fontsize=12)
-            plt.xticks(fontsize=12)
-            plt.tight_layout()
+                ax.set_xlabel('Participants', fontsize=14)
+                ax.set_ylabel('Sentiment Distribution (%)', fontsize=14)
+                ax.set_title('Sentiment Distribution by Participant', fontsize=16)
+                ax.legend(fontsize=12)
+                ax.tick_params(axis='x', labelsize=12)
+                fig.tight_layout()
             
-            participant_file = os.path.join(viz_abs_dir, "participant_sentiment.png")
-            plt.savefig(participant_file, dpi=300)
-            plt.close()
-            visualization_files.append(os.path.basename(participant_file))
-            report_content += f"![Participant Sentiment]({viz_rel_path_prefix}/participant_sentiment.png)\n\n"
+                participant_file = os.path.join(viz_abs_dir, "participant_sentiment.png")
+                fig.savefig(participant_file, dpi=CHART_DPI)
+                visualization_files.append(os.path.basename(participant_file))
+                report_parts.append(f"![Participant Sentiment]({viz_rel_path_prefix}/participant_sentiment.png)\n\n")
             
-        # 4. Engagement Metrics Bar Chart (improved)
-        if analysis_data.engagement_metrics:
-            engagement_data = analysis_data.engagement_metrics
-            participants = list(engagement_data.keys())
+            # 4. Engagement Metrics Bar Chart (improved)
+            if analysis_data.engagement_metrics:
+                engagement_data = analysis_data.engagement_metrics
+                participants = list(engagement_data.keys())
             
-            # Get names for labels
-            participant_labels = []
-            for p in participants:
-                if p in analysis_data.participant_sentiment:
-                    name = analysis_data.participant_sentiment[p].name
-                    participant_labels.append(f"{p}\n({name})")
-                else:
-                    participant_labels.append(p)
+                # Get names for labels
+                participant_labels = []
+                for p in participants:
+                    if p in analysis_data.participant_sentiment:
+                        name = analysis_data.participant_sentiment[p].name
+                        participant_labels.append(f"{p}\n({name})")
+                    else:
+                        participant_labels.append(p)
             
-            # 
-            metrics_df = {
-                'Participant': [],
-                'Metric': [],
-                'Value': [],
-                'Scaled Value': []  # For visualization purposes
-            }
+                # 
+                metrics_df = {
+                    'Participant': [],
+                    'Metric': [],
+                    'Value': [],
+                    'Scaled Value': []  # For visualization purposes
+                }
             
-            # Get max values for scaling
-            max_word_count = max([engagement_data[p].word_count for p in participants])
-            max_response_count = max([engagement_data[p].response_count for p in participants])
-            max_interaction = max([engagement_data[p].interaction_score for p in participants])
+                # Get max values for scaling
+                max_word_count = max([engagement_data[p].word_count for p in participants])
+                max_response_count = max([engagement_data[p].response_count for p in participants])
+                max_interaction = max([engagement_data[p].interaction_score for p in participants])
             
-            # Build dataframe for seaborn
-            for p in participants:
-                # Word count (scaled for visualization)
-                metrics_df['Participant'].append(participant_labels[participants.index(p)])
-                metrics_df['Metric'].append('Word Count')
-                metrics_df['Value'].append(engagement_data[p].word_count)
-                metrics_df['Scaled Value'].append(engagement_data[p].word_count / max_word_count * 10)
+                # Build dataframe for seaborn
+                for p in participants:
+                    # Word count (scaled for visualization)
+                    metrics_df['Participant'].append(participant_labels[participants.index(p)])
+                    metrics_df['Metric'].append('Word Count')
+                    metrics_df['Value'].append(engagement_data[p].word_count)
+                    metrics_df['Scaled Value'].append(engagement_data[p].word_count / max_word_count * 10)
                 
-                # Response count
-                metrics_df['Participant'].append(participant_labels[participants.index(p)])
-                metrics_df['Metric'].append('Response Count')
-                metrics_df['Value'].append(engagement_data[p].response_count)
-                metrics_df['Scaled Value'].append(engagement_data[p].response_count / max_response_count * 10)
+                    # Response count
+                    metrics_df['Participant'].append(participant_labels[participants.index(p)])
+                    metrics_df['Metric'].append('Response Count')
+                    metrics_df['Value'].append(engagement_data[p].response_count)
+                    metrics_df['Scaled Value'].append(engagement_data[p].response_count / max_response_count * 10)
                 
-                # Interaction score
-                metrics_df['Participant'].append(participant_labels[participants.index(p)])
-                metrics_df['Metric'].append('Interaction Score')
-                metrics_df['Value'].append(engagement_data[p].interaction_score)
-                metrics_df['Scaled Value'].append(engagement_data[p].interaction_score / max_interaction * 10)
+                    # Interaction score
+                    metrics_df['Participant'].append(participant_labels[participants.index(p)])
+                    metrics_df['Metric'].append('Interaction Score')
+                    metrics_df['Value'].append(engagement_data[p].interaction_score)
+                    metrics_df['Scaled Value'].append(engagement_data[p].interaction_score / max_interaction * 10)
             
-            plt.figure(figsize=(14, 10))
-            sns.set_style("whitegrid")
+                sns.set_style("whitegrid")
+                fig, ax = _new_figure((14, 10))
             
-            # Plot grouped bar chart with seaborn
-            ax = sns.barplot(x='Participant', y='Scaled Value', hue='Metric', 
-                          data=metrics_df, palette="deep")
+                # Plot grouped bar chart with seaborn
+                sns.barplot(x='Participant', y='Scaled Value', hue='Metric', 
+                            data=metrics_df, palette="deep", ax=ax)
             
-            # Add value labels on the bars - Fix the indexing error
-            try:
-                # Only add labels if there are patches created
-                if ax.patches:
-                    # Create a mapping between patch index and original values
-                    value_index = 0
-                    for i, p in enumerate(ax.patches):
-                        if value_index < len(metrics_df['Value']):
-                            height = p.get_height()
-                            orig_value = metrics_df['Value'][value_index]
-                            ax.text(p.get_x() + p.get_width()/2., height + 0.1, f'{orig_value}', 
-                                  ha="center", fontsize=9)
-                            value_index += 1
-            except Exception as e:
-                logger.warning(f"Could not add value labels to engagement metrics chart: {e}")
+                # Add value labels on the bars - Fix the indexing error
+                try:
+                    # Only add labels if there are patches created
+                    if ax.patches:
+                        # Create a mapping between patch index and original values
+                        value_index = 0
+                        for i, p in enumerate(ax.patches):
+                            if value_index < len(metrics_df['Value']):
+                                height = p.get_height()
+                                orig_value = metrics_df['Value'][value_index]
+                                ax.text(p.get_x() + p.get_width()/2., height + 0.1, f'{orig_value}', 
+                                      ha="center", fontsize=9)
+                                value_index += 1
+                except Exception as e:
+                    logger.warning(f"Could not add value labels to engagement metrics chart: {e}")
             
-            plt.title('Participant Engagement Metrics', fontsize=16)
-            plt.ylabel('Scaled Value (0-10)', fontsize=14)
-            plt.xlabel('Participants', fontsize=14)
-            plt.legend(title='Metric', fontsize=12)
-            plt.tight_layout()
+                ax.set_title('Participant Engagement Metrics', fontsize=16)
+                ax.set_ylabel('Scaled Value (0-10)', fontsize=14)
+                ax.set_xlabel('Participants', fontsize=14)
+                ax.legend(title='Metric', fontsize=12)
+                fig.tight_layout()
             
-            engagement_file = os.path.join(viz_abs_dir, "engagement_metrics.png")
-            plt.savefig(engagement_file, dpi=300)
-            plt.close()
-            visualization_files.append(os.path.basename(engagement_file))
-            report_content += f"![Engagement Metrics]({viz_rel_path_prefix}/engagement_metrics.png)\n\n"
+                engagement_file = os.path.join(viz_abs_dir, "engagement_metrics.png")
+                fig.savefig(engagement_file, dpi=CHART_DPI)
+                visualization_files.append(os.path.basename(engagement_file))
+                report_parts.append(f"![Engagement Metrics]({viz_rel_path_prefix}/engagement_metrics.png)\n\n")
         
-        # 5. Knowledge Graph of Interactions
-        # Create a network graph visualization of interactions between participants
-        interaction_graph = nx.Graph()
+            # 5. Knowledge Graph of Interactions
+            # Create a network graph visualization of interactions between participants
+            interaction_graph = nx.Graph()
         
-        # Extract participant names for node labels
-        participant_names = {}
-        for i, profile in enumerate(participant_profiles):
-            pid = f"Participant_{i+1}"
-            participant_names[pid] = profile.name
-        participant_names["Moderator"] = "Moderator"
+            # Extract participant names for node labels
+            participant_names = {}
+            for i, profile in enumerate(participant_profiles):
+                pid = f"Participant_{i+1}"
+                participant_names[pid] = profile.name
+            participant_names["Moderator"] = "Moderator"
         
-        # Create a more structured conversation model for better visualization
-        # Moderator connects to all participants, participants connect based on reply patterns
-        interaction_counts = {}
+            # Create a more structured conversation model for better visualization
+            # Moderator connects to all participants, participants connect based on reply patterns
+            interaction_counts = {}
         
-        # First add all nodes
-        for pid in participant_names:
-            interaction_graph.add_node(pid)
+            # First add all nodes
+            for pid in participant_names:
+                interaction_graph.add_node(pid)
         
-        # Track interactions between each pair of speakers
-        for i in range(len(transcript) - 1):
-            current_speaker = transcript[i].speaker_id
-            next_speaker = transcript[i+1].speaker_id
+            # Track interactions between each pair of speakers
+            for i in range(len(transcript) - 1):
+                current_speaker = transcript[i].speaker_id
+                next_speaker = transcript[i+1].speaker_id
             
-            if current_speaker != next_speaker:  # Only count transitions between different speakers
-                pair = tuple(sorted([current_speaker, next_speaker]))  # Sort to create unique key
-                if pair not in interaction_counts:
-                    interaction_counts[pair] = 0
-                interaction_counts[pair] += 1
+                if current_speaker != next_speaker:  # Only count transitions between different speakers
+                    pair = tuple(sorted([current_speaker, next_speaker]))  # Sort to create unique key
+                    if pair not in interaction_counts:
+                        interaction_counts[pair] = 0
+                    interaction_counts[pair] += 1
         
-        # Add weighted edges based on interaction counts
-        for pair, count in interaction_counts.items():
-            if count > 0:  # Only add edges with actual interactions
-                interaction_graph.add_edge(pair[0], pair[1], weight=count)
+            # Add weighted edges based on interaction counts
+            for pair, count in interaction_counts.items():
+                if count > 0:  # Only add edges with actual interactions
+                    interaction_graph.add_edge(pair[0], pair[1], weight=count)
         
-        # Create an interactive network graph with improved styling
-        # Create a circular layout first to position nodes in a circle
-        pos = nx.circular_layout(interaction_graph)
+            # Create an interactive network graph with improved styling
+            # Create a circular layout first to position nodes in a circle
+            pos = nx.circular_layout(interaction_graph)
         
-        # Save positions for each node
-        node_positions = {}
-        for node, position in pos.items():
-            # Scale positions to pixel values (vis.js expects pixel values)
-            x, y = position * 500  # Scale factor to make layout larger
-            node_positions[node] = (float(x), float(y))
+            # Save positions for each node
+            node_positions = {}
+            for node, position in pos.items():
+                # Scale positions to pixel values (vis.js expects pixel values)
+                x, y = position * 500  # Scale factor to make layout larger
+                node_positions[node] = (float(x), float(y))
         
-        # Create network with larger dimensions for better visibility
-        net = Network(height="800px", width="100%", bgcolor="#FFFFFF", font_color="black", directed=False)
+            # Create network with larger dimensions for better visibility
+            net = Network(height="800px", width="100%", bgcolor="#FFFFFF", font_color="black", directed=False)
         
-        # 
-        net.barnes_hut(
-            gravity=-15000,           # Less negative gravity for more compact layout
-            central_gravity=0.5,      # Stronger central gravity to pull nodes together
-            spring_length=150,        # Shorter spring length for connections
-            spring_strength=0.05,     # Stronger springs for more structured layout
-            damping=0.09,
-            overlap=0.1               # Allow slight overlap for denser layout
-        )
+            # 
+            net.barnes_hut(
+                gravity=-15000,           # Less negative gravity for more compact layout
+                central_gravity=0.5,      # Stronger central gravity to pull nodes together
+                spring_length=150,        # Shorter spring length for connections
+                spring_strength=0.05,     # Stronger springs for more structured layout
+                damping=0.09,
+                overlap=0.1               # Allow slight overlap for denser layout
+            )
         
-        # Create a custom color scheme for node types
-        moderator_color = "#EB5757"  # Red for moderator
-        sentiment_colors = {
-            "positive": "#27AE60",    # Green for positive sentiment
-            "neutral": "#2F80ED",     # Blue for neutral sentiment
-            "negative": "#F2994A"     # Orange for negative sentiment
-        }
+            # Create a custom color scheme for node types
+            moderator_color = "#EB5757"  # Red for moderator
+            sentiment_colors = {
+                "positive": "#27AE60",    # Green for positive sentiment
+                "neutral": "#2F80ED",     # Blue for neutral sentiment
+                "negative": "#F2994A"     # Orange for negative sentiment
+            }
         
-        # Add nodes with improved styling and fixed positions
-        for node in interaction_graph.nodes():
-            if node == "Moderator":
-                net.add_node(
-                    node, 
-                    label="Moderator", 
-                    title="Focus Group Moderator", 
-                    color=moderator_color, 
-                    size=35,
-                    shape="star",
-                    physics=False,  # Disable physics for fixed position
-                    x=node_positions[node][0],
-                    y=node_positions[node][1]
-                )
-            else:
-                # Determine sentiment-based color
-                if node in analysis_data.participant_sentiment:
-                    sentiment = analysis_data.participant_sentiment[node]
+            # Add nodes with improved styling and fixed positions
+            for node in interaction_graph.nodes():
+                if node == "Moderator":
+                    net.add_node(
+                        node, 
+                        label="Moderator", 
+                        title="Focus Group Moderator", 
+                        color=moderator_color, 
+                        size=35,
+                        shape="star",
+                        physics=False,  # Disable physics for fixed position
+                        x=node_positions[node][0],
+                        y=node_positions[node][1]
+                    )
+                else:
+                    # Determine sentiment-based color
+                    if node in analysis_data.participant_sentiment:
+                        sentiment = analysis_data.participant_sentiment[node]
                     
-                    # Choose dominant sentiment
-                    dominant = max(
-                        ("positive", sentiment.positive), 
-                        ("neutral", sentiment.neutral), 
-                        ("negative", sentiment.negative), 
-                        key=lambda x: x[1]
-                    )[0]
+                        # Choose dominant sentiment
+                        dominant = max(
+                            ("positive", sentiment.positive), 
+                            ("neutral", sentiment.neutral), 
+                            ("negative", sentiment.negative), 
+                            key=lambda x: x[1]
+                        )[0]
                     
-                    color = sentiment_colors[dominant]
+                        color = sentiment_colors[dominant]
                     
-                    # Get engagement for node size
-                    if node in analysis_data.engagement_metrics:
-                        # Base size on word count to make more active participants larger
-                        word_count = analysis_data.engagement_metrics[node].word_count
-                        response_count = analysis_data.engagement_metrics[node].response_count
-                        size = 20 + min(30, (word_count / 50)) + (response_count * 2)
+                        # Get engagement for node size
+                        if node in analysis_data.engagement_metrics:
+                            # Base size on word count to make more active participants larger
+                            word_count = analysis_data.engagement_metrics[node].word_count
+                            response_count = analysis_data.engagement_metrics[node].response_count
+                            size = 20 + min(30, (word_count / 50)) + (response_count * 2)
+                        else:
+                            size = 25
                     else:
-                        size = 25
-                else:
-                    color = "#97C2FC"  # Default blue
+                        color = "#97C2FC"  # Default blue
                 
-                label = participant_names[node]
+                    label = participant_names[node]
                 
-                # Create detailed title/tooltip
-                title = f"{label} ({node})"
-                if node in analysis_data.participant_sentiment:
-                    sentiment = analysis_data.participant_sentiment[node]
-                    title += f"<br>Sentiment: {dominant.capitalize()}"
+                    # Create detailed title/tooltip
+                    title = f"{label} ({node})"
+                    if node in analysis_data.participant_sentiment:
+                        sentiment = analysis_data.participant_sentiment[node]
+                        title += f"<br>Sentiment: {dominant.capitalize()}"
                 
-                if node in analysis_data.engagement_metrics:
-                    metrics = analysis_data.engagement_metrics[node]
-                    title += f"<br>Words: {metrics.word_count}, Responses: {metrics.response_count}"
+                    if node in analysis_data.engagement_metrics:
+                        metrics = analysis_data.engagement_metrics[node]
+                        title += f"<br>Words: {metrics.word_count}, Responses: {metrics.response_count}"
                 
-                net.add_node(
-                    node, 
-                    label=label, 
-                    title=title, 
-                    color=color, 
-                    size=size,
-                    shape="dot",
-                    physics=False,  # Disable physics for fixed position
-                    x=node_positions[node][0],
-                    y=node_positions[node][1]
-                )
-        
-        # Add edges with improved styling based on interaction frequency
-        max_weight = max(data.get('weight', 1) for _, _, data in interaction_graph.edges(data=True))
+                    net.add_node(
+                        node, 
+                        label=label, 
+                        title=title, 
+                        color=color, 
+                        size=size,
+                        shape="dot",
+                        physics=False,  # Disable physics for fixed position
+                        x=node_positions[node][0],
+                        y=node_positions[node][1]
+                    )
         
-        for edge in interaction_graph.edges(data=True):
-            source, target, data = edge
-            weight = data.get('weight', 1)
+            # Add edges with improved styling based on interaction frequency
+            # Materialize the edge view once; it is reused for max_weight, the interactive graph and the static PNG
+            edges_with_data = list(interaction_graph.edges(data=True))
+            max_weight = max((data.get('weight', 1) for _, _, data in edges_with_data), default=1)
+
+            for edge in edges_with_data:
+                source, target, data = edge
+                weight = data.get('weight', 1)
             
-            # Scale edge width based on relative interaction frequency
-            # Min width 1, max width 10
-            scaled_width = 1 + ((weight / max_weight) * 9)
+                # Scale edge width based on relative interaction frequency
+                # Min width 1, max width 10
+                scaled_width = 1 + ((weight / max_weight) * 9)
             
-            # Determine the total number of interactions
-            interaction_count = data.get('weight', 1)
+                # Determine the total number of interactions
+                interaction_count = data.get('weight', 1)
             
-            # Create detailed edge title
-            title = f"{participant_names[source]} ⟷ {participant_names[target]}: {interaction_count} interactions"
+                # Create detailed edge title
+                title = f"{participant_names[source]} ⟷ {participant_names[target]}: {interaction_count} interactions"
             
-            # Add edge with custom styling
-            net.add_edge(
-                source, 
-                target, 
-                value=scaled_width, 
-                title=title,
-                color={"color": "#555555", "opacity": 0.8},  # Gray with slight transparency
-                arrowStrikethrough=False,  # Better arrow appearance
-                smooth={"type": "continuous"}  # Smoother curves
-            )
+                # Add edge with custom styling
+                net.add_edge(
+                    source, 
+                    target, 
+                    value=scaled_width, 
+                    title=title,
+                    color={"color": "#555555", "opacity": 0.8},  # Gray with slight transparency
+                    arrowStrikethrough=False,  # Better arrow appearance
+                    smooth={"type": "continuous"}  # Smoother curves
+                )
         
-        # Add network options for better visualization
-        net.set_options("""
+            # Add network options for better visualization
+            net.set_options("""
         {
           "interaction": {
             "hover": true,
@@ -1311,172 +1411,185 @@ def generate_report(analysis: str, parameters: Dict[str, Any], transcript: List[
         }
         """)
         
-        # Generate network
-        knowledge_graph_file = os.path.join(viz_abs_dir, "knowledge_graph.html")
-        net.save_graph(knowledge_graph_file)
-        visualization_files.append(os.path.basename(knowledge_graph_file))
-        report_content += f"[Knowledge Graph of Interactions]({viz_rel_path_prefix}/knowledge_graph.html) (Interactive visualization)\n\n"
+            # Generate network
+            knowledge_graph_file = os.path.join(viz_abs_dir, "knowledge_graph.html")
+            net.save_graph(knowledge_graph_file)
+            visualization_files.append(os.path.basename(knowledge_graph_file))
+            report_parts.append(f"[Knowledge Graph of Interactions]({viz_rel_path_prefix}/knowledge_graph.html) (Interactive visualization)\n\n")
         
-        # Also generate a static PNG version for embedding in reports
-        try:
-            # Create a static version using matplotlib
-            plt.figure(figsize=(12, 10))
+            # Also generate a static PNG version for embedding in reports.
+            # For small groups (the default 4 participants + moderator) it adds little over the interactive HTML, so skip it.
+            if interaction_graph.number_of_nodes() >= 8:
+                try:
+                    # Create a static version using matplotlib
+                    fig, ax = _new_figure((12, 10))
             
-            # Create a nice layout for the graph
-            pos = nx.spring_layout(interaction_graph, k=0.5, iterations=50)
+                    # Create a nice layout for the graph
+                    pos = nx.spring_layout(interaction_graph, k=0.5, iterations=50)
             
-            # Get edge weights for line thickness
-            edge_weights = [data.get('weight', 1) * 2 for _, _, data in interaction_graph.edges(data=True)]
+                    # Get edge weights for line thickness
+                    edge_weights = [data.get('weight', 1) * 2 for _, _, data in edges_with_data]
             
-            # Create node groups for coloring
-            moderator_nodes = [n for n in interaction_graph.nodes() if n == "Moderator"]
-            participant_nodes = [n for n in interaction_graph.nodes() if n != "Moderator"]
+                    # Create node groups for coloring
+                    moderator_nodes = [n for n in interaction_graph.nodes() if n == "Moderator"]
+                    participant_nodes = [n for n in interaction_graph.nodes() if n != "Moderator"]
             
-            # Draw the nodes with different colors based on role
-            nx.draw_networkx_nodes(interaction_graph, pos, 
-                                  nodelist=moderator_nodes, 
-                                  node_color="#EB5757", 
-                                  node_size=800,
-                                  alpha=0.9)
+                    # Draw the nodes with different colors based on role
+                    nx.draw_networkx_nodes(interaction_graph, pos, 
+                                          nodelist=moderator_nodes, 
+                                          node_color="#EB5757", 
+                                          node_size=800,
+                                          alpha=0.9,
+                                          ax=ax)
             
-            # Draw participant nodes with sentiment-based colors
-            participant_colors = []
-            for node in participant_nodes:
-                if node in analysis_data.participant_sentiment:
-                    sentiment = analysis_data.participant_sentiment[node]
-                    # Simple RGB blend based on sentiment
-                    r = int(255 * sentiment.negative)
-                    g = int(255 * sentiment.positive)
-                    b = int(255 * sentiment.neutral)
-                    participant_colors.append(f"#{r:02x}{g:02x}{b:02x}")
-                else:
-                    participant_colors.append("#97C2FC")  # Default blue
+                    # Draw participant nodes with sentiment-based colors
+                    participant_colors = []
+                    for node in participant_nodes:
+                        if node in analysis_data.participant_sentiment:
+                            sentiment = analysis_data.participant_sentiment[node]
+                            # Simple RGB blend based on sentiment
+                            r = int(255 * sentiment.negative)
+                            g = int(255 * sentiment.positive)
+                            b = int(255 * sentiment.neutral)
+                            participant_colors.append(f"#{r:02x}{g:02x}{b:02x}")
+                        else:
+                            participant_colors.append("#97C2FC")  # Default blue
             
-            nx.draw_networkx_nodes(interaction_graph, pos, 
-                                  nodelist=participant_nodes, 
-                                  node_color=participant_colors,
-                                  node_size=600,
-                                  alpha=0.8)
+                    nx.draw_networkx_nodes(interaction_graph, pos, 
+                                          nodelist=participant_nodes, 
+                                          node_color=participant_colors,
+                                          node_size=600,
+                                          alpha=0.8,
+                                          ax=ax)
             
-            # Draw the edges with weight-based thickness
-            nx.draw_networkx_edges(interaction_graph, pos, 
-                                  width=edge_weights,
-                                  alpha=0.7, 
-                                  edge_color='gray')
+                    # Draw the edges with weight-based thickness
+                    nx.draw_networkx_edges(interaction_graph, pos, 
+                                          width=edge_weights,
+                                          alpha=0.7, 
+                                          edge_color='gray',
+                                          ax=ax)
             
-            # Add labels with participant names
-            nx.draw_networkx_labels(interaction_graph, pos, 
-                                   labels={n: participant_names.get(n, n) for n in interaction_graph.nodes()},
-                                   font_size=10, 
-                                   font_weight='bold')
+                    # Add labels with participant names
+                    nx.draw_networkx_labels(interaction_graph, pos, 
+                                           labels={n: participant_names.get(n, n) for n in interaction_graph.nodes()},
+                                           font_size=10, 
+                                           font_weight='bold',
+                                           ax=ax)
             
-            plt.title("Focus Group Interaction Network", fontsize=16)
-            plt.axis('off')  # Turn off axis
+                    ax.set_title("Focus Group Interaction Network", fontsize=16)
+                    ax.axis('off')  # Turn off axis
+                    fig.tight_layout()
             
-            # Save static image
-            static_graph_file = os.path.join(viz_abs_dir, "knowledge_graph.png")
-            plt.savefig(static_graph_file, dpi=300, bbox_inches='tight')
-            plt.close()
-            visualization_files.append(os.path.basename(static_graph_file))
-            report_content += f"![Knowledge Graph (Static Version)]({viz_rel_path_prefix}/knowledge_graph.png)\n\n"
-        except Exception as e:
-            logger.warning(f"Could not create static knowledge graph image: {e}")
-            # Continue even if static image fails
+                    # Save static image
+                    static_graph_file = os.path.join(viz_abs_dir, "knowledge_graph.png")
+                    fig.savefig(static_graph_file, dpi=CHART_DPI)
+                    visualization_files.append(os.path.basename(static_graph_file))
+                    report_parts.append(f"![Knowledge Graph (Static Version)]({viz_rel_path_prefix}/knowledge_graph.png)\n\n")
+                except Exception as e:
+                    logger.warning(f"Could not create static knowledge graph image: {e}")
+                    # Continue even if static image fails
+            else:
+                console.log("[dim]Skipping static knowledge graph (too few nodes).")
         
-        # 6. Sentiment Analysis Over Time Visualization
-        # time-series visualization of sentiment
-        speaker_order = []
-        sentiments = []
-        speaker_names = []
+            # 6. Sentiment Analysis Over Time Visualization
+            # time-series visualization of sentiment
+            speaker_order = []
+            sentiments = []
+            speaker_names = []
         
-        # Calculate sentiment for each dialogue entry
-        for entry in transcript:
-            speaker_order.append(entry.speaker_id)
-            speaker_names.append(entry.speaker_name)
+            # Calculate sentiment for each dialogue entry
+            for entry in transcript:
+                speaker_order.append(entry.speaker_id)
+                speaker_names.append(entry.speaker_name)
             
-            # Calculate sentiment with TextBlob
-            blob = TextBlob(entry.content)
-            sentiments.append(blob.sentiment.polarity)
+                # Calculate sentiment with TextBlob
+                blob = TextBlob(entry.content)
+                sentiments.append(blob.sentiment.polarity)
         
-        # Create a time series visualization
-        plt.figure(figsize=(15, 8))
+            # Create a time series visualization
+            fig, ax = _new_figure((15, 8))
         
-        # Create a colormap for different speakers
-        unique_speakers = list(set(speaker_order))
-        cmap = plt.cm.get_cmap('tab10', len(unique_speakers))
-        speaker_colors = {speaker: cmap(i) for i, speaker in enumerate(unique_speakers)}
+            # Create a colormap for different speakers
+            unique_speakers = list(set(speaker_order))
+            # Index the tab10 palette directly rather than resampling a colormap per report
+            base_colors = colormaps["tab10"].colors
+            speaker_colors = {speaker: base_colors[i % len(base_colors)] for i, speaker in enumerate(unique_speakers)}
         
-        # Plot points with different colors for different speakers
-        for i, (speaker, sentiment) in enumerate(zip(speaker_order, sentiments)):
-            plt.scatter(i, sentiment, color=speaker_colors[speaker], s=100, 
-                      label=participant_names[speaker] if speaker not in plt.gca().get_legend_handles_labels()[1] else "")
-            
-            # Connect points from the same speaker with a dotted line
-            if i > 0 and speaker == speaker_order[i-1]:
-                plt.plot([i-1, i], [sentiments[i-1], sentiment], 'k--', alpha=0.3)
+            # Convert the series to arrays once; each speaker's points then go in a single scatter call
+            speaker_index = {speaker: i for i, speaker in enumerate(unique_speakers)}
+            speaker_codes = np.fromiter((speaker_index[speaker] for speaker in speaker_order), dtype=np.int32, count=len(speaker_order))
+            sentiment_values = np.asarray(sentiments, dtype=np.float64)
+            for speaker, code in speaker_index.items():
+                positions = np.flatnonzero(speaker_codes == code)
+                ax.scatter(positions, sentiment_values[positions], color=speaker_colors[speaker], s=100,
+                           label=participant_names[speaker])
         
-        # Add labels and annotations
-        for i, (speaker, sentiment, name) in enumerate(zip(speaker_order, sentiments, speaker_names)):
-            # Add speaker name for every 5th point to avoid crowding
-            if i % 5 == 0:
-                plt.annotate(name, (i, sentiment), 
-                           textcoords="offset points", 
-                           xytext=(0, 10), 
-                           ha='center',
-                           fontsize=8)
+            # Connect consecutive points from the same speaker with dotted segments, drawn as one
+            # NaN-separated line instead of a plot call per pair
+            ends = np.flatnonzero(speaker_codes[1:] == speaker_codes[:-1]) + 1
+            if ends.size:
+                gap = np.full(ends.size, np.nan)
+                segment_x = np.column_stack((ends - 1, ends, gap)).ravel()
+                segment_y = np.column_stack((sentiment_values[ends - 1], sentiment_values[ends], gap)).ravel()
+                ax.plot(segment_x, segment_y, 'k--', alpha=0.3)
         
-        plt.axhline(y=0, color='gray', linestyle='-', alpha=0.3)
-        plt.ylim(-1.1, 1.1)
-        plt.title('Sentiment Progression Throughout the Focus Group', fontsize=16)
-        plt.xlabel('Sequential Dialogue Order', fontsize=14)
-        plt.ylabel('Sentiment Polarity (-1 to 1)', fontsize=14)
-        plt.grid(True, alpha=0.3)
+            # Add labels and annotations
+            for i, (speaker, sentiment, name) in enumerate(zip(speaker_order, sentiments, speaker_names)):
+                # Add speaker name for every 5th point to avoid crowding
+                if i % 5 == 0:
+                    ax.annotate(name, (i, sentiment), 
+                                textcoords="offset points", 
+                                xytext=(0, 10), 
+                                ha='center',
+                                fontsize=8)
         
-        # Create a custom legend
-        legend_elements = [plt.Line2D([0], [0], marker='o', color='w', 
-                                   markerfacecolor=speaker_colors[speaker], 
-                                   label=participant_names[speaker], markersize=10) 
-                                 for speaker in unique_speakers]
-        plt.legend(handles=legend_elements, title="Participants", loc='upper center', 
-                 bbox_to_anchor=(0.5, -0.15), fancybox=True, shadow=True, ncol=3)
+            ax.axhline(y=0, color='gray', linestyle='-', alpha=0.3)
+            ax.set_ylim(-1.1, 1.1)
+            ax.set_title('Sentiment Progression Throughout the Focus Group', fontsize=16)
+            ax.set_xlabel('Sequential Dialogue Order', fontsize=14)
+            ax.set_ylabel('Sentiment Polarity (-1 to 1)', fontsize=14)
+            ax.grid(True, alpha=0.3)
         
-        plt.tight_layout()
+            # Create a custom legend
+            legend_elements = [Line2D([0], [0], marker='o', color='w', 
+                                      markerfacecolor=speaker_colors[speaker], 
+                                      label=participant_names[speaker], markersize=10) 
+                               for speaker in unique_speakers]
+            ax.legend(handles=legend_elements, title="Participants", loc='upper center', 
+                      bbox_to_anchor=(0.5, -0.15), fancybox=True, shadow=True, ncol=3)
         
-        sentiment_time_file = os.path.join(viz_abs_dir, "sentiment_progression.png")
-        plt.savefig(sentiment_time_file, dpi=300, bbox_inches='tight')
-        plt.close()
-        visualization_files.append(os.path.basename(sentiment_time_file))
-        report_content += f"![Sentiment Progression]({viz_rel_path_prefix}/sentiment_progression.png)\n\n"
+            fig.tight_layout()
+            fig.subplots_adjust(bottom=0.25)  # Leave room for the legend below the axes
         
-        console.log(f"[green]Generated {len(visualization_files)} visualization files.")
+            sentiment_time_file = os.path.join(viz_abs_dir, "sentiment_progression.png")
+            fig.savefig(sentiment_time_file, dpi=CHART_DPI)
+            visualization_files.append(os.path.basename(sentiment_time_file))
+            report_parts.append(f"![Sentiment Progression]({viz_rel_path_prefix}/sentiment_progression.png)\n\n")
         
-    except Exception as e:
-        logger.error(f"Error generating visualizations: {e}")
-        logger.error(traceback.format_exc())
-        report_content += "**Error generating some visualizations. See console for details.**\n\n"
+            console.log(f"[green]Generated {len(visualization_files)} visualization files.")
+        
+        except Exception as e:
+            logger.error(f"Error generating visualizations: {e}")
+            logger.error(traceback.format_exc())
+            report_parts.append("**Error generating some visualizations. See console for details.**\n\n")
     
-    report_content += """
+        report_parts.append("""
 ## 5. Full Transcript
-"""
-    for entry in transcript:
-        report_content += f"- **{entry.speaker_name} ({entry.speaker_id}):** {entry.content}\n\n"
+""")
+        report_parts.extend(f"- **{entry.speaker_name} ({entry.speaker_id}):** {entry.content}\n\n" for entry in transcript)
 
-    # Save the report to a file with timestamp
-    report_filename = os.path.join(base_output_dir, "report.md")
-    with open(report_filename, "w", encoding='utf-8') as f:
-        f.write(report_content)
-    console.log(f"[green]Report saved successfully as: {report_filename}")
+        # Save the report to a file with timestamp
+        report_filename = os.path.join(base_output_dir, "report.md")
+        await asyncio.to_thread(_write_report, report_filename, report_parts)
+        console.log(f"[green]Report saved successfully as: {report_filename}")
     
-    # Also save the transcript as a CSV file
-    transcript_filename = os.path.join(base_output_dir, "transcript.csv")
-    with open(transcript_filename, "w", newline='', encoding='utf-8') as f:
-        writer = csv.writer(f)
-        writer.writerow(["Speaker ID", "Speaker Name", "Dialogue", "Timestamp"])
-        for entry in transcript:
-            writer.writerow([entry.speaker_id, entry.speaker_name, entry.content, entry.timestamp])
-    console.log(f"[green]Transcript saved successfully as: {transcript_filename}")
+        # The transcript CSV has been writing alongside; make sure it finished
+        await csv_task
 
-    return visualization_files
+        return visualization_files
+    finally:
+        # Settles the CSV write if an earlier step raised, without masking that error; a no-op otherwise
+        await asyncio.gather(csv_task, return_exceptions=True)
 
 # --- Main Execution ---
 
@@ -1564,13 +1677,19 @@ async def main():
 
         if transcript:
             console.log("[bold green]Simulation completed successfully. Analyzing results...[/bold green]")
-            analysis, analysis_data = await analyze_transcript(analyst, transcript, participant_profiles)
-            
-            console.log("[bold green]Analysis completed. Generating report and visualizations...[/bold green]")
-            visualization_files = generate_report(analysis, params, transcript, analysis_data, participant_profiles, simulation_id)
+            # The transcript CSV only needs the transcript, so write it while the analyst call is in flight
+            csv_task = _start_transcript_csv(simulation_id, transcript)
+            try:
+                analysis, analysis_data = await analyze_transcript(analyst, transcript, participant_profiles)
+
+                console.log("[bold green]Analysis completed. Generating report and visualizations...[/bold green]")
+                visualization_files = await generate_report(analysis, params, transcript, analysis_data, participant_profiles, simulation_id, csv_task)
+            finally:
+                # generate_report awaits the CSV write, but the analyst call may fail before it runs
+                await asyncio.gather(csv_task, return_exceptions=True)
             
             console.log("[bold green]Focus group simulation completed successfully![/bold green]")
-            console.log(f"Report and {len(visualization_files)} visualizations saved to: openai-simulations-ui/public/simulations/focus-group/{simulation_id}/")
+            console.log(f"Report and {len(visualization_files)} visualizations saved to: {os.path.join(FOCUS_GROUP_OUTPUT_ROOT, simulation_id)}/")
         else:
             console.log("[bold red]Simulation did not produce a transcript. Analysis skipped.")
             
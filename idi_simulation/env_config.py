@@ -0,0 +1,34 @@
+import os
+import sys
+from typing import Callable, Optional, Union
+
+Number = Union[int, float]
+
+
+def env_number(name: str, default: Number, cast: Callable[[str], Number] = int,
+               minimum: Optional[Number] = None, maximum: Optional[Number] = None) -> Number:
+    """
+    Reads a numeric setting from the environment, falling back to default when unset.
+    An unparsable or out-of-range value exits with a message naming the variable, the same
+    way the CLI rejects bad flags, instead of failing later with a bare traceback.
+    """
+    raw = os.environ.get(name)
+    if raw is None or not raw.strip():
+        return default
+    try:
+        value = cast(raw)
+        if value != value: # NaN passes every range check, so reject it as unparsable
+            raise ValueError(raw)
+    except ValueError:
+        print(f"Error: {name} must be {'an integer' if cast is int else 'a number'}, got {raw!r}")
+        sys.exit(1)
+    if (minimum is not None and value < minimum) or (maximum is not None and value > maximum):
+        if maximum is None:
+            allowed = f"at least {minimum}"
+        elif minimum is None:
+            allowed = f"at most {maximum}"
+        else:
+            allowed = f"between {minimum} and {maximum}"
+        print(f"Error: {name} must be {allowed}, got {value}")
+        sys.exit(1)
+    return value
@@ -1,35 +1,30 @@
 import os
+import gc
+import functools
+import hashlib
+import itertools
 import asyncio
 import re
-import json
-import argparse
+import orjson
 import sys
-import matplotlib.pyplot as plt
-import datetime
-import numpy as np
 from datetime import datetime
 from dotenv import load_dotenv
-from agents import Agent, Runner
-from typing import List, Dict, Any, Tuple
-import csv
-from collections import Counter
+from openai import AsyncOpenAI, Timeout
+from agents import Agent, ModelSettings, set_default_openai_client
+from llm_cache import CACHE_ENABLED, cached_run, cached_run_streamed
+from env_config import env_number
+from typing import List, Dict, Any, Iterable, Tuple, Optional, Union
+from pydantic import BaseModel, Field, StrictFloat, StrictInt
 
 # Load environment variables from .env file
 load_dotenv()
 
-# --- Agent Definitions ---
+# --- Static Agent Instructions ---
+# Kept free of per-run values so every call starts with a byte-identical prefix,
+# which lets the provider's prompt cache reuse it. Per-run details are appended last.
 
-class InterviewerAgent(Agent):
-    """
-    Expert interviewer who conducts the in-depth interview,
-    asking questions and follow-ups to gain deep insights.
-    """
-    def __init__(self, topic: str, respondent_profile: str, num_questions: int = 8):
-        super().__init__(
-            name="IDI Interviewer",
-            instructions=f"""You are an expert qualitative researcher and interviewer with over 15 years of experience in in-depth interviews.
-Your goal is to conduct an insightful and productive in-depth interview on the topic: '{topic}'.
-You're interviewing a respondent with the following profile: {respondent_profile}.
+INTERVIEWER_STATIC_INSTRUCTIONS = """You are an expert qualitative researcher and interviewer with over 15 years of experience in in-depth interviews.
+Your goal is to conduct an insightful and productive in-depth interview on the topic given in the INTERVIEW DETAILS below, with the respondent profiled there.
 
 INTERVIEW APPROACH:
 - Start with a warm welcome, brief introduction of yourself, and establish rapport
@@ -39,7 +34,7 @@ INTERVIEW APPROACH:
 - Practice active listening and reflect back what you hear
 - Ask follow-up questions based on the respondent's answers
 - Avoid leading questions or imposing your own views
-- Cover approximately {num_questions} main questions throughout the interview
+- Cover approximately the number of main questions given in the INTERVIEW DETAILS throughout the interview
 - Explore unexpected insights that emerge during the conversation
 - Use silence strategically to allow the respondent to elaborate
 - Maintain a conversational, non-judgmental tone
@@ -47,62 +42,100 @@ INTERVIEW APPROACH:
 
 Ensure your questions are thought-provoking and designed to elicit rich, detailed responses.
 Adapt your questioning strategy based on how the interview unfolds.
-Your output should be ONLY your dialogue as the interviewer.""",
-            model="o3-mini" 
-        )
-        self.topic = topic
-        self.respondent_profile = respondent_profile
-        self.num_questions = num_questions
+Your output should be ONLY your dialogue as the interviewer."""
 
-class RespondentAgent(Agent):
-    """
-    Represents the interview respondent, answering based on their assigned persona.
-    """
-    def __init__(self, persona_data: Dict[str, Any], topic: str):
-        # --- Create a highly detailed and structured persona description ---
-        # Safely extract data, ensuring nested structures are dicts
-        name = persona_data.get("name", "Unknown")
-        age = persona_data.get("age", "N/A")
-        gender = persona_data.get("gender", "N/A")
-        occupation = persona_data.get("occupation", "N/A")
-        education = persona_data.get("education", "N/A")
-        location = persona_data.get("location", "N/A")
-        income_bracket = persona_data.get("income_bracket", "N/A")
-
-        demographics = persona_data.get("demographics", {}) if isinstance(persona_data.get("demographics"), dict) else {}
-        psychographics = persona_data.get("psychographics", {}) if isinstance(persona_data.get("psychographics"), dict) else {}
-        behaviors = persona_data.get("behaviors", {}) if isinstance(persona_data.get("behaviors"), dict) else {}
-        attitudes = persona_data.get("attitudes", {}) if isinstance(persona_data.get("attitudes"), dict) else {}
-
-        # Extract nested fields safely
-        ethnicity = demographics.get("ethnicity", "N/A")
-        marital_status = demographics.get("marital_status", "N/A")
-        household = demographics.get("household_composition", "N/A")
-        values = psychographics.get("values", [])
-        interests = psychographics.get("interests", [])
-        lifestyle = psychographics.get("lifestyle_details", "N/A")
-        personality = psychographics.get("personality_traits", [])
-        consumption = behaviors.get("consumption_patterns", "N/A")
-        usage = behaviors.get("usage_habits", "N/A")
-        opinions = attitudes.get("opinions", "N/A")
-        beliefs = attitudes.get("beliefs", "N/A")
-        sentiment_topic = attitudes.get("sentiments_towards_topic", "Neutral")
-
-        media_consumption = persona_data.get("media_consumption", [])
-        motivations = persona_data.get("motivations", "N/A")
-        challenges = persona_data.get("challenges", "N/A")
-        topic_experience = persona_data.get("topic_experience", "N/A")
-        brand_affinities = persona_data.get("brand_affinities", [])
-        communication_style = persona_data.get("communication_style", "natural and authentic")
-
-        # Format lists cleanly
-        values_str = ', '.join(values) if values else 'N/A'
-        interests_str = ', '.join(interests) if interests else 'N/A'
-        personality_str = ', '.join(personality) if personality else 'N/A'
-        media_str = ', '.join(media_consumption) if media_consumption else 'N/A'
-        brands_str = ', '.join(brand_affinities) if brand_affinities else 'N/A'
-
-        persona_description = f"""
+ANALYST_STATIC_INSTRUCTIONS = """You are a senior qualitative research analyst with deep expertise in analyzing in-depth interview (IDI) transcripts.
+You have been provided with an IDI transcript on the topic given in the STUDY DETAILS below, with a respondent from the target audience given there.
+**CRITICAL TASK:** Perform a rigorous, data-driven analysis of this transcript. Your goal is to identify accurate insights based *only* on the provided text.
+
+**ANALYSIS REQUIREMENTS:**
+1.  **Sentiment Analysis (Transcript-Wide & Per Turn):**
+    *   Analyze the respondent's dialogue turn-by-turn. Classify the sentiment (Positive, Neutral, Negative) expressed in *each response* concerning the topic being discussed at that point.
+    *   **Calculate** the overall sentiment distribution (percentage Positive, Neutral, Negative) for the *entire interview* by aggregating the turn-by-turn classifications. Base this calculation strictly on the respondent's utterances in the transcript.
+2.  **Thematic Analysis:** Identify the major themes discussed by the respondent regarding the study topic. For each theme:
+    *   Describe the theme clearly.
+    *   Estimate its prominence (e.g., discussed frequently, mentioned briefly).
+    *   Provide 1-2 direct, representative quotes from the respondent *exactly* as they appear in the transcript to illustrate the theme.
+    *   Note the dominant sentiment associated with the theme based on your turn-by-turn analysis.
+3.  **Insight Extraction:** Synthesize findings from themes and sentiment analysis to uncover key insights about the respondent's perspective, motivations, pain points, and attitudes related to the study topic.
+4.  **Response Pattern Analysis:** Briefly comment on the respondent's communication style as observed in the transcript (e.g., detailed, concise, hesitant, confident), referencing their persona's `communication_style` if provided. Note any significant non-verbal cues implied (e.g., "seemed enthusiastic when discussing X"). Word counts and hesitation markers are pre-calculated and given with the transcript; use those figures rather than counting yourself.
+
+**REPORT STRUCTURE:**
+Generate a professional report with the following sections:
+1.  **Executive Summary:** Concise overview of the most critical findings, focusing on the respondent's core attitudes, motivations, and key takeaways regarding the study topic (approx. 150 words). Include the calculated overall sentiment breakdown.
+2.  **Research Background:** Briefly restate the study topic and target audience.
+3.  **Methodology:** Note it was a simulated 1-on-1 in-depth interview.
+4.  **Respondent Profile Summary:** Briefly summarize the key characteristics of the interviewed persona provided to you.
+5.  **Key Themes:** Detail the identified themes with descriptions, illustrative quotes (exact wording), and associated sentiment.
+6.  **Sentiment Analysis Findings:** Report the **calculated** overall sentiment distribution (%). Discuss how sentiment evolved or related to specific sub-topics based on your turn-by-turn analysis.
+7.  **Response Patterns:** Briefly describe the observed communication style and any implied non-verbal cues.
+8.  **Actionable Insights & Recommendations:** Translate the findings into 2-3 strategic insights or potential actions relevant to the study topic.
+9.  **Limitations:** Acknowledge the limitations of a single simulated interview.
+10. **Suggestions for Further Research:** Recommend 1-2 follow-up questions or areas.
+
+**STRUCTURED OUTPUT:**
+Your response is returned as a structured object with two parts:
+*   `narrative`: the full narrative report described above, in Markdown.
+*   `structured`: data derived *directly and accurately* from YOUR analysis of the transcript. **DO NOT use placeholder values. Calculate these values based on the transcript.**
+    *   `key_themes`: 3-5 key themes identified and analyzed (e.g., theme "Cost Concerns", prominence "High", sentiment "Negative", with a description and an exact quote).
+    *   `sentiment_by_turn`: your calculated sentiment for EACH respondent turn analyzed (e.g., turn 1, "Neutral", "Initial greeting/topic intro"). The overall distribution shown in the report charts is aggregated from these classifications.
+
+Adhere strictly to these instructions. Calculation accuracy and fidelity to the transcript are paramount."""
+
+# Per-run agent instructions are filled into these module-level templates with str.format,
+# rather than rebuilt from multi-KB f-strings inside each function or constructor call.
+# Literal braces in them are doubled.
+
+PERSONA_GENERATOR_INSTRUCTIONS_TEMPLATE = """You are an expert research methodologist specializing in qualitative research recruitment and persona development.
+Based on the target audience description: '{target_audience}', generate a single, highly detailed, realistic, and internally coherent respondent persona suitable for an in-depth interview on the topic: '{topic}'.
+
+**CRITICAL: Adhere STRICTLY to the MANDATORY JSON STRUCTURE below. Pay meticulous attention to nested objects (MUST be actual JSON objects, not strings) and data types. Ensure depth and realism.**
+
+**MANDATORY JSON STRUCTURE:** The persona MUST be a SINGLE JSON object with the exact fields specified below.
+
+```json
+{{
+  "name": "String: Full name (e.g., 'Alex Chen', 'Maria Garcia')",
+  "age": "Number: Numeric age (e.g., 38)",
+  "gender": "String: Gender identity (e.g., 'Female', 'Male', 'Non-binary')",
+  "occupation": "String: Specific current job title/professional role (e.g., 'Senior Software Engineer', 'Registered Nurse', 'Freelance Graphic Designer')",
+  "education": "String: Highest educational attainment (e.g., 'Master's Degree in Public Health', 'Bachelor of Arts in History')",
+  "location": "String: Reasonably specific location (e.g., 'Chicago, IL, USA', 'Suburban area near London, UK')",
+  "income_bracket": "String: Income level category or range (e.g., '$70k-$90k USD', '£40k-£55k GBP', 'Upper-middle income')",
+  "demographics": {{ // Nested JSON Object - REQUIRED
+    "ethnicity": "String: e.g., 'East Asian', 'White European', 'Black/African Descent', 'Hispanic/Latino'",
+    "marital_status": "String: e.g., 'Married', 'Single', 'Divorced', 'Partnered'",
+    "household_composition": "String: e.g., 'Living with partner and one young child', 'Living alone with a pet', 'Multigenerational household'",
+    "other_relevant_demographics": "String: Any other key demographic detail (e.g., 'First-generation immigrant', 'Military veteran', or null)"
+  }},
+  "psychographics": {{ // Nested JSON Object - REQUIRED
+    "values": ["String", "String", "..."], // Array of 2-4 core personal values (e.g., "Community involvement", "Personal growth", "Financial security")
+    "interests": ["String", "String", "..."], // Array of 3-5 specific interests/hobbies (e.g., "Playing competitive chess", "Urban gardening", "Following indie music scene")
+    "lifestyle_details": "String: Description of daily life/routine/activities (e.g., 'Commutes by bike, active in local environmental groups, enjoys cooking at home')",
+    "personality_traits": ["String", "String", "..."] // Array of 3-5 descriptive traits (e.g., "Expressive", "Collaborative", "Cautious", "Optimistic")
+  }},
+  "behaviors": {{ // Nested JSON Object - REQUIRED
+    "consumption_patterns": "String: Behaviors related to the topic (e.g., 'Rarely uses mobile banking, prefers desktop', 'Shops for sustainable products weekly')",
+    "usage_habits": "String: Specific habits related to the topic/technology (e.g., 'Follows sustainability influencers online', 'Rarely considers environmental impact when shopping')",
+    "other_relevant_behaviors": "String: Other related behaviors (e.g., 'Actively participates in online forums about [topic]', or null)"
+  }},
+  "attitudes": {{ // Nested JSON Object - REQUIRED
+    "opinions": "String: Specific opinions on the interview topic '{topic}' (e.g., 'Feels sustainable footwear lacks style options', 'Thinks brands greenwash too much')",
+    "beliefs": "String: Underlying beliefs related to the topic (e.g., 'Believes individual actions matter for sustainability', 'Thinks convenience often outweighs ethical concerns')",
+    "sentiments_towards_topic": "String: Overall feeling about the topic (e.g., 'Passionate Advocate', 'Interested but Confused', 'Slightly Skeptical', 'Apathetic')"
+  }},
+  "media_consumption": ["String", "String", "..."], // Array of 2-4 specific media sources/types (e.g., "Instagram", "Specific environmental blogs", "BBC News")
+  "motivations": "String: Primary drivers or goals in life/work (e.g., 'Expressing personal style authentically', 'Reducing personal environmental footprint', 'Finding affordable solutions')",
+  "challenges": "String: Key current challenges or pain points (e.g., 'Finding trustworthy information about brand sustainability', 'Balancing budget with ethical purchasing', 'Lack of time for research')",
+  "topic_experience": "String: Specific past experiences related to '{topic}' (e.g., 'Used competitor App X for 2 years, switched due to fees', 'Tried sustainable brand Y, found quality poor', 'No direct experience but researched extensively')",
+  "brand_affinities": ["String", "String", "..."], // Array of 1-3 specific brands they like or use (relevant if possible, e.g., "Allbirds", "Zara", "Nike")
+  "communication_style": "String: How they tend to communicate (e.g., 'Thoughtful and detailed', 'Concise and direct', 'Warm and conversational', 'Slightly hesitant initially', 'Data-driven and analytical')"
+}}
+```
+
+**Output Requirement:** Return your response ONLY as a single, valid JSON object adhering strictly to the structure defined above. Ensure all specified fields, including nested objects and their sub-fields, are present and correctly typed. NO commentary before or after the JSON object."""
+
+RESPONDENT_INSTRUCTIONS_TEMPLATE = """
 --- YOUR DETAILED PERSONA PROFILE ---
 **Identity:** {name}, {age}, {gender}
 **Background:** Living in {location}, Occupation: {occupation}, Education: {education}, Income Bracket: {income_bracket}
@@ -145,11 +178,173 @@ class RespondentAgent(Agent):
 
 Think: How would **{name}**, with all their specific characteristics and experiences, genuinely react and contribute to *this specific point* in the conversation?"""
 
+# --- Structured Analyst Output ---
+# The analyst returns these models through the SDK's structured output support, so its data
+# arrives already parsed and validated instead of as a JSON block embedded in the narrative.
+
+class KeyTheme(BaseModel):
+    theme: str
+    prominence: str = Field(description="How prominent the theme was, e.g. High, Medium, Low")
+    sentiment: str = Field(description="Positive, Neutral or Negative")
+    description: str
+    example_quote: str = Field(description="Exact quote from the respondent illustrating the theme")
+
+class TurnSentiment(BaseModel):
+    turn_number: int
+    sentiment: str = Field(description="Positive, Neutral or Negative")
+    topic_discussed: str
+
+class AnalysisData(BaseModel):
+    key_themes: List[KeyTheme]
+    sentiment_by_turn: List[TurnSentiment]
+
+class AnalystOutput(BaseModel):
+    narrative: str = Field(description="The full narrative analysis report in Markdown")
+    structured: AnalysisData
+
+# Mandatory persona structure, checked in one compiled pydantic-core pass. Values are only
+# validated, never coerced or copied: the generated dict itself is what gets saved and used.
+
+class PersonaDemographics(BaseModel):
+    ethnicity: Any
+    marital_status: Any
+    household_composition: Any
+
+class PersonaPsychographics(BaseModel):
+    values: List[Any]
+    interests: Any
+    lifestyle_details: Any
+    personality_traits: Any
+
+class PersonaBehaviors(BaseModel):
+    consumption_patterns: Any
+    usage_habits: Any
+
+class PersonaAttitudes(BaseModel):
+    opinions: Any
+    beliefs: Any
+    sentiments_towards_topic: Any
+
+class PersonaSchema(BaseModel):
+    name: Any
+    age: Union[StrictInt, StrictFloat]
+    gender: Any
+    occupation: Any
+    education: Any
+    location: Any
+    income_bracket: Any
+    demographics: PersonaDemographics
+    psychographics: PersonaPsychographics
+    behaviors: PersonaBehaviors
+    attitudes: PersonaAttitudes
+    media_consumption: List[Any]
+    motivations: Any
+    challenges: Any
+    topic_experience: Any
+    brand_affinities: Any
+    communication_style: Any
+
+# --- Agent Definitions ---
+
+def _prompt_cache_settings(instructions: str) -> ModelSettings:
+    """
+    Routes every call that shares these instructions to the same provider prompt cache.
+    Without an explicit key the SDK generates a new one per Runner call, so consecutive
+    turns of one interview could land on different cache shards.
+    """
+    instructions_hash = hashlib.sha256(instructions.encode("utf-8")).hexdigest()[:32]
+    return ModelSettings(extra_args={"prompt_cache_key": f"idi-{instructions_hash}"})
+
+class InterviewerAgent(Agent):
+    """
+    Expert interviewer who conducts the in-depth interview,
+    asking questions and follow-ups to gain deep insights.
+    """
+    def __init__(self, topic: str, respondent_profile: str, num_questions: int = 8):
+        super().__init__(
+            name="IDI Interviewer",
+            instructions=f"""{INTERVIEWER_STATIC_INSTRUCTIONS}
+
+INTERVIEW DETAILS:
+- Topic: '{topic}'
+- Respondent profile: {respondent_profile}
+- Main questions to cover: approximately {num_questions}""",
+            model="o3-mini" 
+        )
+        self.model_settings = _prompt_cache_settings(self.instructions)
+        self.topic = topic
+        self.respondent_profile = respondent_profile
+        self.num_questions = num_questions
+
+# (template placeholder, persona section or None for top-level keys, key, default) for the respondent instructions
+_RESPONDENT_SCALAR_FIELDS = (
+    ("name", None, "name", "Unknown"),
+    ("age", None, "age", "N/A"),
+    ("gender", None, "gender", "N/A"),
+    ("occupation", None, "occupation", "N/A"),
+    ("education", None, "education", "N/A"),
+    ("location", None, "location", "N/A"),
+    ("income_bracket", None, "income_bracket", "N/A"),
+    ("ethnicity", "demographics", "ethnicity", "N/A"),
+    ("marital_status", "demographics", "marital_status", "N/A"),
+    ("household", "demographics", "household_composition", "N/A"),
+    ("lifestyle", "psychographics", "lifestyle_details", "N/A"),
+    ("consumption", "behaviors", "consumption_patterns", "N/A"),
+    ("usage", "behaviors", "usage_habits", "N/A"),
+    ("opinions", "attitudes", "opinions", "N/A"),
+    ("beliefs", "attitudes", "beliefs", "N/A"),
+    ("sentiment_topic", "attitudes", "sentiments_towards_topic", "Neutral"),
+    ("motivations", None, "motivations", "N/A"),
+    ("challenges", None, "challenges", "N/A"),
+    ("topic_experience", None, "topic_experience", "N/A"),
+    ("communication_style", None, "communication_style", "natural and authentic"),
+)
+# List-valued persona fields, rendered comma-separated
+_RESPONDENT_LIST_FIELDS = (
+    ("values_str", "psychographics", "values"),
+    ("interests_str", "psychographics", "interests"),
+    ("personality_str", "psychographics", "personality_traits"),
+    ("media_str", None, "media_consumption"),
+    ("brands_str", None, "brand_affinities"),
+)
+
+@functools.lru_cache(maxsize=256)
+def _render_respondent_instructions(persona_json: bytes, topic: str) -> str:
+    """
+    Builds the respondent's persona instructions. Keyed on the canonical (key-sorted) persona
+    JSON so agents recreated for the same persona and topic reuse the rendered string.
+    """
+    persona_data = orjson.loads(persona_json)
+    # Nested sections are only trusted when they are dicts; None addresses the top level
+    sections = {None: persona_data}
+    for section in ("demographics", "psychographics", "behaviors", "attitudes"):
+        nested = persona_data.get(section)
+        sections[section] = nested if isinstance(nested, dict) else {}
+
+    fields = {placeholder: sections[section].get(key, default)
+              for placeholder, section, key, default in _RESPONDENT_SCALAR_FIELDS}
+    # Format lists cleanly
+    for placeholder, section, key in _RESPONDENT_LIST_FIELDS:
+        items = sections[section].get(key, [])
+        fields[placeholder] = ', '.join(items) if items else 'N/A'
+
+    persona_description = RESPONDENT_INSTRUCTIONS_TEMPLATE.format(topic=topic, **fields)
+    return persona_description
+
+class RespondentAgent(Agent):
+    """
+    Represents the interview respondent, answering based on their assigned persona.
+    """
+    def __init__(self, persona_data: Dict[str, Any], topic: str):
+        name = persona_data.get("name", "Unknown")
+        persona_description = _render_respondent_instructions(orjson.dumps(persona_data, option=orjson.OPT_SORT_KEYS), topic)
+
         super().__init__(
             name=name, # Use actual name for the agent instance
             instructions=persona_description, # Pass the detailed prompt here
             model="o3-mini" 
         )
+        self.model_settings = _prompt_cache_settings(self.instructions)
         self.topic = topic
         self.persona_data = persona_data # Store for potential later use
 
@@ -161,71 +356,106 @@ class AnalystAgent(Agent):
     def __init__(self, topic: str, target_audience: str):
         super().__init__(
             name="IDI Analyst",
-            instructions=f"""You are a senior qualitative research analyst with deep expertise in analyzing in-depth interview (IDI) transcripts.
-You have been provided with an IDI transcript on '{topic}' with a respondent from the target audience: '{target_audience}'.
-**CRITICAL TASK:** Perform a rigorous, data-driven analysis of this transcript. Your goal is to identify accurate insights based *only* on the provided text.
-
-**ANALYSIS REQUIREMENTS:**
-1.  **Sentiment Analysis (Transcript-Wide & Per Turn):**
-    *   Analyze the respondent's dialogue turn-by-turn. Classify the sentiment (Positive, Neutral, Negative) expressed in *each response* concerning the topic being discussed at that point.
-    *   **Calculate** the overall sentiment distribution (percentage Positive, Neutral, Negative) for the *entire interview* by aggregating the turn-by-turn classifications. Base this calculation strictly on the respondent's utterances in the transcript.
-2.  **Thematic Analysis:** Identify the major themes discussed by the respondent regarding '{topic}'. For each theme:
-    *   Describe the theme clearly.
-    *   Estimate its prominence (e.g., discussed frequently, mentioned briefly).
-    *   Provide 1-2 direct, representative quotes from the respondent *exactly* as they appear in the transcript to illustrate the theme.
-    *   Note the dominant sentiment associated with the theme based on your turn-by-turn analysis.
-3.  **Insight Extraction:** Synthesize findings from themes and sentiment analysis to uncover key insights about the respondent's perspective, motivations, pain points, and attitudes related to '{topic}'.
-4.  **Response Pattern Analysis:** Briefly comment on the respondent's communication style as observed in the transcript (e.g., detailed, concise, hesitant, confident), referencing their persona's `communication_style` if provided. Note any significant non-verbal cues implied (e.g., "seemed enthusiastic when discussing X").
-
-**REPORT STRUCTURE:**
-Generate a professional report with the following sections:
-1.  **Executive Summary:** Concise overview of the most critical findings, focusing on the respondent's core attitudes, motivations, and key takeaways regarding '{topic}' (approx. 150 words). Include the calculated overall sentiment breakdown.
-2.  **Research Background:** Briefly restate the study topic and target audience.
-3.  **Methodology:** Note it was a simulated 1-on-1 in-depth interview.
-4.  **Respondent Profile Summary:** Briefly summarize the key characteristics of the interviewed persona provided to you.
-5.  **Key Themes:** Detail the identified themes with descriptions, illustrative quotes (exact wording), and associated sentiment.
-6.  **Sentiment Analysis Findings:** Report the **calculated** overall sentiment distribution (%). Discuss how sentiment evolved or related to specific sub-topics based on your turn-by-turn analysis.
-7.  **Response Patterns:** Briefly describe the observed communication style and any implied non-verbal cues.
-8.  **Actionable Insights & Recommendations:** Translate the findings into 2-3 strategic insights or potential actions relevant to '{topic}'.
-9.  **Limitations:** Acknowledge the limitations of a single simulated interview.
-10. **Suggestions for Further Research:** Recommend 1-2 follow-up questions or areas.
-
-**MANDATORY JSON OUTPUT:**
-AFTER your narrative analysis, include a JSON-formatted section containing structured data derived *directly and accurately* from YOUR analysis of the transcript. **DO NOT use placeholder values. Calculate these values based on the transcript.**
+            instructions=f"""{ANALYST_STATIC_INSTRUCTIONS}
 
-```json
-{{
-  "sentiment_breakdown": {{ // CALCULATED overall sentiment distribution for the respondent
-    "positive": <calculated_positive_percentage>, // e.g., 45.5
-    "neutral": <calculated_neutral_percentage>, // e.g., 30.0
-    "negative": <calculated_negative_percentage> // e.g., 24.5
-  }},
-  "key_themes": [ // Identified themes from your analysis
-    // Example: {{"theme": "Cost Concerns", "prominence": "High", "sentiment": "Negative", "description": "Respondent frequently expressed concerns about the affordability...", "example_quote": "..."}},
-    // Add 3-5 key themes identified and analyzed
-  ],
-  "response_metrics": {{ // CALCULATED metrics based on transcript
-    "avg_response_length_words": <calculated_avg_respondent_response_word_count>,
-    "total_respondent_word_count": <calculated_total_respondent_word_count>,
-    "estimated_hesitation_markers": <count_of_markers_like_um_uh> // Count actual markers if possible
-  }},
-  "sentiment_by_turn": [ // Your calculated sentiment for each respondent turn
-    // Example: {{"turn_number": 1, "sentiment": "Neutral", "topic_discussed": "Initial greeting/topic intro"}},
-    // Example: {{"turn_number": 2, "sentiment": "Positive", "topic_discussed": "Positive experience with feature X"}},
-    // Add entry for EACH respondent turn analyzed
-  ]
-}}
-```
-
-Adhere strictly to these instructions. Calculation accuracy and fidelity to the transcript are paramount.""",
-            model="gpt-4.1" 
+STUDY DETAILS:
+- Topic: '{topic}'
+- Target audience: '{target_audience}'""",
+            model="gpt-4.1",
+            output_type=AnalystOutput
         )
+        self.model_settings = _prompt_cache_settings(self.instructions)
         self.topic = topic
         self.target_audience = target_audience
 
 
 # --- Core Functions ---
 
+# Respondent speech metrics: hesitation markers as whole words/phrases, and vocabulary words for unique counts
+_HESITATION_RE = re.compile(r"\b(?:um|uh|hmm|er|ah|like|you know)\b", re.IGNORECASE)
+_VOCABULARY_RE = re.compile(r"[a-z0-9]+(?:'[a-z]+)?")
+
+# Interviewer question classifier: each match is one question, labelled by the first alternative
+# it satisfies (probing phrase, then open-ended cue word, else closed)
+_QUESTION_CLASSIFY_RE = re.compile(
+    r"(?P<probing>[^.!?]*?(?:tell me more|how did that|why do you|could you explain|what makes you say)[^.!?]*\?)"
+    r"|(?P<open>[^.!?]*?\b(?:what|how|why|describe|explain|share)\b[^.!?]*\?)"
+    r"|(?P<closed>[^.!?]*\?)",
+    re.IGNORECASE
+)
+_QUESTION_TYPE_LABELS = {"open": "Open-ended", "probing": "Probing", "closed": "Closed"}
+
+# Percentage inside free-text theme prominence, e.g. "about 40% of answers"
+_PERCENT_RE = re.compile(r"(\d+)%")
+
+# Simulation IDs become output directory names, so only plain path-safe characters are allowed
+_SIMULATION_ID_RE = re.compile(r"[A-Za-z0-9_-]+")
+
+# Opening of a ```json fence in model output, in any letter case
+_JSON_FENCE_RE = re.compile(r"```json", re.IGNORECASE)
+
+def _classify_questions(interviewer_dialogues: List[str]) -> Dict[str, int]:
+    """Counts the interviewer's questions by type in one regex pass over all of their turns."""
+    counts = dict.fromkeys(_QUESTION_TYPE_LABELS.values(), 0)
+    # Turns are joined with a sentence break so an unpunctuated turn ending can't run into the next question
+    for match in _QUESTION_CLASSIFY_RE.finditer(".\n".join(interviewer_dialogues)):
+        counts[_QUESTION_TYPE_LABELS[match.lastgroup]] += 1
+    return counts
+
+def _extract_json_object(text: str) -> Optional[str]:
+    """
+    Returns the first complete top-level JSON object in text, or None.
+    Starts after a ```json fence when there is one, then does a single forward scan tracking
+    brace depth (ignoring braces inside strings), so prose or a fence around the object is skipped.
+    """
+    # Matched on text itself: lower() can change the string's length and shift the offsets
+    fence = _JSON_FENCE_RE.search(text)
+    start = text.find("{", fence.end() if fence else 0)
+    if start == -1:
+        return None
+    depth = 0
+    in_string = False
+    escaped = False
+    for i in range(start, len(text)):
+        char = text[i]
+        if in_string:
+            if escaped:
+                escaped = False
+            elif char == "\\":
+                escaped = True
+            elif char == '"':
+                in_string = False
+        elif char == '"':
+            in_string = True
+        elif char == "{":
+            depth += 1
+        elif char == "}":
+            depth -= 1
+            if depth == 0:
+                return text[start:i + 1]
+    return None
+
+# Simulation outputs live under <IDI_OUTPUT_ROOT>/<simulation_id>, which the UI serves from its public/ folder
+IDI_OUTPUT_ROOT = os.path.join("openai-simulations-ui", "public", "simulations", "idi")
+
+def _ensure_dir(path: str) -> None:
+    """Creates path if needed; on reruns it already exists, which a single stat confirms."""
+    if not os.path.isdir(path):
+        os.makedirs(path, exist_ok=True)
+
+def _write_json(path: str, data: Any) -> None:
+    """Writes compact JSON; with IDI_DEBUG set, also writes an indented .pretty.json copy for reading."""
+    _ensure_dir(os.path.dirname(path))
+    with open(path, "wb") as f:
+        f.write(orjson.dumps(data))
+    if os.environ.get("IDI_DEBUG"):
+        with open(os.path.splitext(path)[0] + ".pretty.json", "wb") as f:
+            f.write(orjson.dumps(data, option=orjson.OPT_INDENT_2))
+
+async def _awrite_json(path: str, data: Any) -> None:
+    """Runs _write_json in a worker thread so file I/O doesn't block the event loop."""
+    await asyncio.to_thread(_write_json, path, data)
+
 async def generate_respondent_persona(target_audience: str, topic: str, simulation_id: str) -> Dict[str, Any]:
     """
     Generates a detailed respondent persona using gpt-4.1 and validates the structure.
@@ -233,120 +463,42 @@ async def generate_respondent_persona(target_audience: str, topic: str, simulati
     """
     persona_generator_agent = Agent(
         name="Persona Generator",
-        instructions=f"""You are an expert research methodologist specializing in qualitative research recruitment and persona development.
-Based on the target audience description: '{target_audience}', generate a single, highly detailed, realistic, and internally coherent respondent persona suitable for an in-depth interview on the topic: '{topic}'.
-
-**CRITICAL: Adhere STRICTLY to the MANDATORY JSON STRUCTURE below. Pay meticulous attention to nested objects (MUST be actual JSON objects, not strings) and data types. Ensure depth and realism.**
-
-**MANDATORY JSON STRUCTURE:** The persona MUST be a SINGLE JSON object with the exact fields specified below.
-
-```json
-{{
-  "name": "String: Full name (e.g., 'Alex Chen', 'Maria Garcia')",
-  "age": "Number: Numeric age (e.g., 38)",
-  "gender": "String: Gender identity (e.g., 'Female', 'Male', 'Non-binary')",
-  "occupation": "String: Specific current job title/professional role (e.g., 'Senior Software Engineer', 'Registered Nurse', 'Freelance Graphic Designer')",
-  "education": "String: Highest educational attainment (e.g., 'Master's Degree in Public Health', 'Bachelor of Arts in History')",
-  "location": "String: Reasonably specific location (e.g., 'Chicago, IL, USA', 'Suburban area near London, UK')",
-  "income_bracket": "String: Income level category or range (e.g., '$70k-$90k USD', '£40k-£55k GBP', 'Upper-middle income')",
-  "demographics": {{ // Nested JSON Object - REQUIRED
-    "ethnicity": "String: e.g., 'East Asian', 'White European', 'Black/African Descent', 'Hispanic/Latino'",
-    "marital_status": "String: e.g., 'Married', 'Single', 'Divorced', 'Partnered'",
-    "household_composition": "String: e.g., 'Living with partner and one young child', 'Living alone with a pet', 'Multigenerational household'",
-    "other_relevant_demographics": "String: Any other key demographic detail (e.g., 'First-generation immigrant', 'Military veteran', or null)"
-  }},
-  "psychographics": {{ // Nested JSON Object - REQUIRED
-    "values": ["String", "String", "..."], // Array of 2-4 core personal values (e.g., "Community involvement", "Personal growth", "Financial security")
-    "interests": ["String", "String", "..."], // Array of 3-5 specific interests/hobbies (e.g., "Playing competitive chess", "Urban gardening", "Following indie music scene")
-    "lifestyle_details": "String: Description of daily life/routine/activities (e.g., 'Commutes by bike, active in local environmental groups, enjoys cooking at home')",
-    "personality_traits": ["String", "String", "..."] // Array of 3-5 descriptive traits (e.g., "Expressive", "Collaborative", "Cautious", "Optimistic")
-  }},
-  "behaviors": {{ // Nested JSON Object - REQUIRED
-    "consumption_patterns": "String: Behaviors related to the topic (e.g., 'Rarely uses mobile banking, prefers desktop', 'Shops for sustainable products weekly')",
-    "usage_habits": "String: Specific habits related to the topic/technology (e.g., 'Follows sustainability influencers online', 'Rarely considers environmental impact when shopping')",
-    "other_relevant_behaviors": "String: Other related behaviors (e.g., 'Actively participates in online forums about [topic]', or null)"
-  }},
-  "attitudes": {{ // Nested JSON Object - REQUIRED
-    "opinions": "String: Specific opinions on the interview topic '{topic}' (e.g., 'Feels sustainable footwear lacks style options', 'Thinks brands greenwash too much')",
-    "beliefs": "String: Underlying beliefs related to the topic (e.g., 'Believes individual actions matter for sustainability', 'Thinks convenience often outweighs ethical concerns')",
-    "sentiments_towards_topic": "String: Overall feeling about the topic (e.g., 'Passionate Advocate', 'Interested but Confused', 'Slightly Skeptical', 'Apathetic')"
-  }},
-  "media_consumption": ["String", "String", "..."], // Array of 2-4 specific media sources/types (e.g., "Instagram", "Specific environmental blogs", "BBC News")
-  "motivations": "String: Primary drivers or goals in life/work (e.g., 'Expressing personal style authentically', 'Reducing personal environmental footprint', 'Finding affordable solutions')",
-  "challenges": "String: Key current challenges or pain points (e.g., 'Finding trustworthy information about brand sustainability', 'Balancing budget with ethical purchasing', 'Lack of time for research')",
-  "topic_experience": "String: Specific past experiences related to '{topic}' (e.g., 'Used competitor App X for 2 years, switched due to fees', 'Tried sustainable brand Y, found quality poor', 'No direct experience but researched extensively')",
-  "brand_affinities": ["String", "String", "..."], // Array of 1-3 specific brands they like or use (relevant if possible, e.g., "Allbirds", "Zara", "Nike")
-  "communication_style": "String: How they tend to communicate (e.g., 'Thoughtful and detailed', 'Concise and direct', 'Warm and conversational', 'Slightly hesitant initially', 'Data-driven and analytical')"
-}}
-```
-
-**Output Requirement:** Return your response ONLY as a single, valid JSON object adhering strictly to the structure defined above. Ensure all specified fields, including nested objects and their sub-fields, are present and correctly typed. NO commentary before or after the JSON object.""",
+        instructions=PERSONA_GENERATOR_INSTRUCTIONS_TEMPLATE.format(target_audience=target_audience, topic=topic),
         model="gpt-4.1" # Use gpt-4.1
     )
 
     print(f"STREAM: Generating respondent persona for topic '{topic}' using gpt-4.1...", flush=True)
-    result = await Runner.run(persona_generator_agent, f"Generate a detailed persona JSON object for an interview on '{topic}' for target audience '{target_audience}'.")
+    # The prompt is the same for every respondent in a batch; keying the cache on the simulation ID
+    # keeps cached runs from replaying one persona (and with it one interview) for all of them
+    result = await cached_run(persona_generator_agent, f"Generate a detailed persona JSON object for an interview on '{topic}' for target audience '{target_audience}'.",
+                              cache_variant=simulation_id)
     response_text = result.final_output
     
     # --- Define output directory ---
-    base_output_dir = os.path.join("openai-simulations-ui", "public", "simulations", "idi", simulation_id)
-    os.makedirs(base_output_dir, exist_ok=True)
+    base_output_dir = os.path.join(IDI_OUTPUT_ROOT, simulation_id)
     persona_file_path = os.path.join(base_output_dir, "persona.json")
     # --- End Define output directory ---
     
     persona = None
     try:
-        # Extract JSON from agent output - properly indented
-        json_match = re.search(r'```json\s*(\{.*?\})\s*```', response_text, re.DOTALL | re.IGNORECASE)
-        if json_match:
-            persona_json = json_match.group(1).strip()
-        else:
-            persona_json = response_text.strip()
-            if not (persona_json.startswith('{') and persona_json.endswith('}')):
-                raise ValueError("Response does not appear to be a valid JSON object.")
+        # Extract JSON from agent output, fenced or not
+        persona_json = _extract_json_object(response_text)
+        if persona_json is None:
+            raise ValueError("Response does not appear to contain a valid JSON object.")
 
-        persona = json.loads(persona_json)
+        persona = orjson.loads(persona_json)
 
         # --- START Data Validation ---
         if not isinstance(persona, dict):
             raise ValueError("Parsed JSON is not a dictionary.")
-
-        required_keys = [ # From mandatory structure
-            "name", "age", "gender", "occupation", "education", "location", "income_bracket",
-            "demographics", "psychographics", "behaviors", "attitudes",
-            "media_consumption", "motivations", "challenges", "topic_experience",
-            "brand_affinities", "communication_style"
-        ]
-        missing_keys = [key for key in required_keys if key not in persona]
-        if missing_keys:
-            raise ValueError(f"Persona missing required top-level keys: {missing_keys}")
-
-        # Validate nested objects
-        required_nested_keys = {
-            "demographics": ["ethnicity", "marital_status", "household_composition"],
-            "psychographics": ["values", "interests", "lifestyle_details", "personality_traits"],
-            "behaviors": ["consumption_patterns", "usage_habits"],
-            "attitudes": ["opinions", "beliefs", "sentiments_towards_topic"]
-        }
-        for nested_key, sub_keys in required_nested_keys.items():
-             if not isinstance(persona.get(nested_key), dict):
-                 raise ValueError(f"Persona key '{nested_key}' is not a JSON object.")
-             missing_sub_keys = [sk for sk in sub_keys if sk not in persona[nested_key]]
-             if missing_sub_keys:
-                  raise ValueError(f"Persona nested object '{nested_key}' missing required keys: {missing_sub_keys}")
-
-        # Validate specific types (basic examples)
-        if not isinstance(persona["age"], (int, float)): raise ValueError("'age' must be a number.")
-        if not isinstance(persona["demographics"], dict): raise ValueError("'demographics' must be an object.")
-        if not isinstance(persona["psychographics"]["values"], list): raise ValueError("'psychographics.values' must be an array.")
-        if not isinstance(persona["media_consumption"], list): raise ValueError("'media_consumption' must be an array.")
+        # Raises a ValidationError (a ValueError) listing every missing key or wrong type at once
+        PersonaSchema.model_validate(persona)
 
         print("STREAM: Persona JSON validation passed.", flush=True)
         # --- END Data Validation ---
         
         # --- Save persona to file ---
-        with open(persona_file_path, "w") as f:
-            json.dump(persona, f, indent=2)
+        await _awrite_json(persona_file_path, persona)
         print(f"STREAM: Generated detailed persona saved to {persona_file_path}", flush=True)
         return persona
 
@@ -368,152 +520,267 @@ Based on the target audience description: '{target_audience}', generate a single
         }
         # --- Save generic persona ---
         try:
-            with open(persona_file_path, "w") as f:
-                json.dump(generic_persona, f, indent=2)
+            await _awrite_json(persona_file_path, generic_persona)
             print(f"STREAM: Saved generic persona to {persona_file_path}", flush=True)
         except Exception as save_e:
             print(f"STREAM: CRITICAL ERROR - Could not save fallback persona: {save_e}", flush=True)
         return generic_persona
 
 
-async def run_interview(interviewer: InterviewerAgent, respondent: RespondentAgent, num_questions: int) -> List[Tuple[str, str]]:
-    """Runs the in-depth interview simulation with names in stream."""
+async def _stream_turn(agent: Agent, prompt: str, speaker_name: str,
+                       previous_response_id: Optional[str] = None) -> Tuple[str, Optional[str]]:
+    """
+    Runs one interview turn with the streaming API, echoing the reply as it is generated.
+    Output is flushed a whole line at a time, since the UI tails stdout line by line. Only the
+    first line carries the 'STREAM: <speaker>: ' prefix; later lines of a multi-line reply are
+    printed bare, the same text a single print of the finished reply would produce.
+    Returns the dialogue and the response id that a follow-up turn can continue from.
+    """
+    pending = [f"STREAM: {speaker_name}: "]
+
+    def on_delta(delta: str) -> None:
+        if "\n" not in delta:
+            pending.append(delta)
+            return
+        head, _, tail = delta.rpartition("\n")
+        pending.append(head)
+        print("".join(pending), flush=True)
+        pending[:] = [tail]
+
+    result = await cached_run_streamed(agent, prompt, on_delta, previous_response_id=previous_response_id)
+    print("".join(pending), flush=True)
+    return result.final_output, result.last_response_id
+
+# Turn-specific instructions appended after the running context; one entry per turn kind
+INTERVIEWER_TURN_PROMPTS = {
+    "opening": "Start the interview. Introduce yourself ({interviewer_name}), explain the purpose about '{topic}', establish rapport with {respondent_name}, and ask your first question. Make the respondent feel comfortable.",
+    "middle": "You are {interviewer_name}. Ask your next question or make a follow-up comment to {respondent_name}. Use probing techniques, active listening, and aim to explore the topic '{topic}' deeply based on their previous responses.",
+    "closing": "This is the final exchange of the interview. Ask {respondent_name} a concluding question to summarize their views on '{topic}' or get final thoughts. Then, thank them sincerely for their time and input.",
+}
+
+RESPONDENT_TURN_PROMPTS = {
+    "opening": "You are {respondent_name}. Respond to the interviewer's introduction and first question based *strictly* on your detailed persona profile and communication style provided in your instructions. Be authentic.",
+    "middle": "You are {respondent_name}. Respond to the interviewer's latest question/comment based *strictly* on your detailed persona profile (including your background, values, experiences, attitudes, motivations, challenges, communication style etc.). Provide a thoughtful, authentic, and consistent response.",
+    "closing": "You are {respondent_name}. This is your final response. Answer the concluding question, share any concluding thoughts on '{topic}' based on your persona, and respond to the interviewer's thank you.",
+}
+
+# Each agent continues its own server-side conversation (previous_response_id), so a turn only
+# sends what was said since that agent last spoke; IDI_SERVER_CONTEXT=0 resends the full context.
+# Chained turns bypass the replay cache, so IDI_LLM_CACHE=1 also sends the full context every turn.
+SERVER_CONTEXT_ENABLED = os.getenv("IDI_SERVER_CONTEXT", "1") != "0" and not CACHE_ENABLED
+
+# How many batch interviews may run at once, and how often a rate-limited or failed API request is retried
+MAX_CONCURRENCY = env_number("IDI_MAX_CONCURRENCY", 8, minimum=1)
+MAX_RETRIES = env_number("IDI_MAX_RETRIES", 5, minimum=0)
+
+# Running-context budget for interview prompts. Tokens are estimated at ~4 characters each,
+# which is close enough for English text and keeps the check free of a tokenizer dependency.
+CONTEXT_TOKEN_BUDGET = 8000
+_CONTEXT_HEADER_SEGMENTS = 3 # Topic and participant lines at the start of the context
+_CONTEXT_RECENT_SEGMENTS = 4 # Latest turns that always stay verbatim
+
+def _estimate_tokens(text: str) -> int:
+    return len(text) // 4 + 1
+
+def _turns_to_condense(context_segments: List[str]) -> Optional[List[str]]:
+    """Returns the older turns to summarize once the context grows past CONTEXT_TOKEN_BUDGET, else None."""
+    if sum(_estimate_tokens(segment) for segment in context_segments) <= CONTEXT_TOKEN_BUDGET:
+        return None
+    older_turns = context_segments[_CONTEXT_HEADER_SEGMENTS:-_CONTEXT_RECENT_SEGMENTS]
+    return older_turns if len(older_turns) >= 2 else None
+
+async def _summarize_turns(older_turns: List[str], topic: str) -> str:
+    """Condenses older interview turns into a single context segment."""
+    summarizer = Agent(
+        name="IDI Context Summarizer",
+        instructions=f"""You condense in-depth interview transcripts on '{topic}'.
+Summarize the given turns in a short paragraph, keeping what the respondent said about their experiences, opinions and feelings, any notable quotes, and which questions have already been asked.
+Output ONLY the summary.""",
+        model="gpt-4.1-mini" # Condensing is a light task; the smaller model keeps it cheap and quick
+    )
+    result = await cached_run(summarizer, "\n".join(older_turns))
+    return f"[Earlier turns summary: {result.final_output.strip()}]"
+
+def _write_jsonl_line(f, record: Dict[str, Any]) -> None:
+    f.write(orjson.dumps(record) + b"\n")
+    f.flush() # Keep the log complete up to the last finished turn if the run dies
+
+async def run_interview(interviewer: InterviewerAgent, respondent: RespondentAgent, num_questions: int,
+                        transcript_log_path: Optional[str] = None) -> List[Tuple[str, str, int]]:
+    """
+    Runs the in-depth interview simulation with names in stream.
+    The first exchange opens the interview and the last one doubles as the conclusion,
+    so an interview of num_questions exchanges (at least 2) takes 2 * num_questions agent calls.
+    While an agent can continue its server-side conversation, its prompt carries only the turns
+    since it last spoke; otherwise (first turn, cache hit, disabled) it gets the full context.
+    Older turns are condensed in the background while the next turn is generated, and swapped
+    into the context once their summary is ready. Chained conversations grow on the server too,
+    so swapping in a summary also restarts both agents from the condensed full context.
+    If transcript_log_path is given, each turn is appended there as a JSON line through one
+    buffered file handle, written in a worker thread while the next agent call is in flight.
+    """
     print("\n--- Starting In-Depth Interview Simulation ---")
     transcript = []
     # Use agent names directly now
     interviewer_name = interviewer.name # Should be "IDI Interviewer" or similar
     respondent_name = respondent.name # Should be the generated persona name
+    # Turn instructions only depend on names and topic, so render them once for the whole interview
+    prompt_values = {"interviewer_name": interviewer_name, "respondent_name": respondent_name, "topic": interviewer.topic}
+    interviewer_instructions = {kind: text.format(**prompt_values) for kind, text in INTERVIEWER_TURN_PROMPTS.items()}
+    respondent_instructions = {kind: text.format(**prompt_values) for kind, text in RESPONDENT_TURN_PROMPTS.items()}
     
-    current_context = f"The interview topic is: {interviewer.topic}\nInterviewer: {interviewer_name}\nRespondent: {respondent_name} ({respondent.persona_data.get('age')} y/o {respondent.persona_data.get('occupation')})"
-    
-    question_count = 0
-    
-    # Introduction phase
-    print(f"{interviewer_name} is preparing introduction...") # Use name
-    intro_prompt = f"""Current context:
-{current_context}
-
-Start the interview. Introduce yourself ({interviewer_name}), explain the purpose about '{interviewer.topic}', establish rapport with {respondent_name}, and ask your first question. Make the respondent feel comfortable."""
-    
-    intro_result = await Runner.run(interviewer, intro_prompt)
-    intro_dialogue = intro_result.final_output
-    print(f"STREAM: {interviewer_name}: {intro_dialogue}", flush=True) # Use name
-    transcript.append((interviewer_name, intro_dialogue))
-    current_context += f"""\n{interviewer_name}: {intro_dialogue}"""
-
-    print(f"{respondent_name} is thinking...") # Use name
-    respondent_prompt = f"""Current context:
-{current_context}
-
-You are {respondent_name}. Respond to the interviewer's introduction and first question based *strictly* on your detailed persona profile and communication style provided in your instructions. Be authentic."""
-    
-    resp_result = await Runner.run(respondent, respondent_prompt)
-    respondent_dialogue = resp_result.final_output
-    print(f"STREAM: {respondent_name}: {respondent_dialogue}", flush=True) # Use name
-    transcript.append((respondent_name, respondent_dialogue))
-    current_context += f"""\n{respondent_name}: {respondent_dialogue}"""
-    
-    question_count += 1
-    
-    # Main interview loop
-    while question_count < num_questions:
-        print(f"\n--- Question {question_count + 1} of {num_questions} ---")
-        
-        # Interviewer's turn
-        print(f"{interviewer_name} is thinking...") # Use name
-        interviewer_prompt = f"""Current context:
-{current_context}
-
-You are {interviewer_name}. Ask your next question or make a follow-up comment to {respondent_name}. Use probing techniques, active listening, and aim to explore the topic '{interviewer.topic}' deeply based on their previous responses."""
-        
-        int_result = await Runner.run(interviewer, interviewer_prompt)
-        interviewer_dialogue = int_result.final_output
-        print(f"STREAM: {interviewer_name}: {interviewer_dialogue}", flush=True) # Use name
-        transcript.append((interviewer_name, interviewer_dialogue))
-        current_context += f"""\n{interviewer_name}: {interviewer_dialogue}"""
-        
-        # Respondent's turn
-        print(f"{respondent_name} is thinking...") # Use name
-        respondent_prompt = f"""Current context:
-{current_context}
-
-You are {respondent_name}. Respond to the interviewer's latest question/comment based *strictly* on your detailed persona profile (including your background, values, experiences, attitudes, motivations, challenges, communication style etc.). Provide a thoughtful, authentic, and consistent response."""
-        
-        resp_result = await Runner.run(respondent, respondent_prompt)
-        respondent_dialogue = resp_result.final_output
-        print(f"STREAM: {respondent_name}: {respondent_dialogue}", flush=True) # Use name
-        transcript.append((respondent_name, respondent_dialogue))
-        current_context += f"""\n{respondent_name}: {respondent_dialogue}"""
-        
-        question_count += 1
-        await asyncio.sleep(0.2) # Shorter delay okay?
-
-    
-    # Conclusion phase
-    print("\n--- Concluding Interview ---")
-    print(f"{interviewer_name} is thinking...") # Use name
-    conclusion_prompt = f"""Current context:
-{current_context}
-
-This is the final part of the interview. Ask {respondent_name} a concluding question to summarize their views on '{interviewer.topic}' or get final thoughts. Then, thank them sincerely for their time and input."""
-    
-    concl_result = await Runner.run(interviewer, conclusion_prompt)
-    conclusion_dialogue = concl_result.final_output
-    print(f"STREAM: {interviewer_name}: {conclusion_dialogue}", flush=True) # Use name
-    transcript.append((interviewer_name, conclusion_dialogue))
-    current_context += f"""\n{interviewer_name}: {conclusion_dialogue}"""
-
-    print(f"{respondent_name} is thinking...") # Use name
-    final_prompt = f"""Current context:
+    # Append-only list of context lines, joined once per prompt instead of re-copying a growing string every turn
+    context_segments = [
+        f"The interview topic is: {interviewer.topic}",
+        f"Interviewer: {interviewer_name}",
+        f"Respondent: {respondent_name} ({respondent.persona_data.get('age')} y/o {respondent.persona_data.get('occupation')})",
+    ]
+
+    if num_questions < 2: # Need at least an opening and a closing exchange
+        raise ValueError(f"An interview needs at least 2 questions, got {num_questions}")
+    turn_kinds = ["opening"] + ["middle"] * (num_questions - 2) + ["closing"]
+    # Opened once for the whole interview, in a worker thread like its writes; a fresh log per run
+    transcript_log = await asyncio.to_thread(open, transcript_log_path, "wb") if transcript_log_path else None
+    response_ids = {interviewer_name: None, respondent_name: None} # Latest response per agent, if chainable
+    unseen_turns = {interviewer_name: [], respondent_name: []} # Turns each agent hasn't been sent yet
+    log_write = None # Previous turn's log write, awaited before the next one is queued
+    compaction = None # (summary task, number of context segments it replaces) while one is in flight
+    try:
+        for question_number, turn_kind in enumerate(turn_kinds, start=1):
+            if turn_kind == "opening":
+                print(f"{interviewer_name} is preparing introduction...")
+            elif turn_kind == "middle":
+                print(f"\n--- Question {question_number} of {num_questions} ---")
+                print(f"{interviewer_name} is thinking...")
+            else:
+                print("\n--- Concluding Interview ---")
+                print(f"{interviewer_name} is thinking...")
+
+            # Interviewer's turn, then the respondent's, each seeing the context so far
+            for agent, speaker_name, turn_instructions in (
+                (interviewer, interviewer_name, interviewer_instructions),
+                (respondent, respondent_name, respondent_instructions),
+            ):
+                if agent is respondent:
+                    print(f"{respondent_name} is thinking...")
+                if compaction and compaction[0].done():
+                    summary_task, condensed_count = compaction
+                    compaction = None
+                    try:
+                        # Only appends happen meanwhile, so the condensed turns are still in place
+                        context_segments[_CONTEXT_HEADER_SEGMENTS:_CONTEXT_HEADER_SEGMENTS + condensed_count] = [summary_task.result()]
+                        # Drop the over-budget server-side conversations; each agent's next prompt is the
+                        # condensed context, whose verbatim recent turns include everything it hasn't seen
+                        response_ids = dict.fromkeys(response_ids)
+                    except Exception as e:
+                        print(f"Warning: Could not condense earlier turns, keeping them verbatim: {e}")
+                previous_response_id = response_ids[speaker_name]
+                if previous_response_id:
+                    new_turns = "\n".join(unseen_turns[speaker_name])
+                    prompt = f"""Since your last turn:
+{new_turns}
+
+{turn_instructions[turn_kind]}"""
+                else:
+                    current_context = "\n".join(context_segments)
+                    prompt = f"""Current context:
 {current_context}
 
-You are {respondent_name}. This is your final response. Share any concluding thoughts on '{interviewer.topic}' based on your persona, and respond to the interviewer's thank you."""
-    
-    final_result = await Runner.run(respondent, final_prompt)
-    final_dialogue = final_result.final_output
-    print(f"STREAM: {respondent_name}: {final_dialogue}", flush=True) # Use name
-    transcript.append((respondent_name, final_dialogue))
-    
+{turn_instructions[turn_kind]}"""
+
+                dialogue, response_id = await _stream_turn(agent, prompt, speaker_name, previous_response_id)
+                response_ids[speaker_name] = response_id if SERVER_CONTEXT_ENABLED else None
+                transcript.append((speaker_name, dialogue, len(dialogue.split()))) # Word count, recorded once per turn
+                turn_line = f"{speaker_name}: {dialogue}"
+                context_segments.append(turn_line)
+                unseen_turns[speaker_name].clear()
+                for other_name, pending_turns in unseen_turns.items():
+                    if other_name != speaker_name:
+                        pending_turns.append(turn_line)
+                if compaction is None:
+                    older_turns = _turns_to_condense(context_segments)
+                    if older_turns:
+                        print("Condensing earlier interview turns to stay within the context budget...")
+                        compaction = (asyncio.create_task(_summarize_turns(older_turns, interviewer.topic)), len(older_turns))
+                if transcript_log_path:
+                    if log_write:
+                        await log_write
+                    log_write = asyncio.create_task(asyncio.to_thread(
+                        _write_jsonl_line, transcript_log,
+                        {"turn": question_number, "speaker": speaker_name, "dialogue": dialogue}))
+    finally:
+        if compaction:
+            compaction[0].cancel() # The interview is over; nothing left to condense for
+        try:
+            if log_write:
+                await log_write
+        finally:
+            if transcript_log:
+                await asyncio.to_thread(transcript_log.close)
     print("\n--- Interview Finished ---")
     return transcript
 
-async def analyze_interview(analyst: AnalystAgent, transcript: List[Tuple[str, str]], respondent_data: Dict[str, Any]) -> Tuple[str, Dict]:
-    """Analyzes the interview transcript using the AnalystAgent, ensuring robust JSON extraction."""
+def _sentiment_breakdown(sentiment_by_turn: List[Dict[str, Any]]) -> Dict[str, float]:
+    """Percentage of respondent turns per sentiment, keyed positive/neutral/negative; unclassified turns count as neutral."""
+    import numpy as np
+
+    labels = ("positive", "neutral", "negative")
+    label_index = {label: i for i, label in enumerate(labels)}
+    turn_labels = np.fromiter((label_index[_sentiment_key(item.get("sentiment"))] for item in sentiment_by_turn),
+                              dtype=np.int8, count=len(sentiment_by_turn))
+    counts = np.bincount(turn_labels, minlength=len(labels))
+    percentages = np.round(counts * 100.0 / max(1, len(turn_labels)), 1)
+    return {label: float(percentage) for label, percentage in zip(labels, percentages)}
+
+async def analyze_interview(analyst: AnalystAgent, transcript: List[Tuple[str, str, int]], respondent_data: Dict[str, Any]) -> Tuple[str, Dict]:
+    """
+    Analyzes the interview transcript using the AnalystAgent's structured output, falling back to defaults.
+    Response metrics are counted locally and handed to the analyst rather than estimated by it.
+    """
     print("\n--- Analyzing Interview Transcript ---")
     
-    # Calculate transcript metrics for fallback generation
-    respondent_turn_counter = 0
-    respondent_word_count = 0
-    hesitation_markers = 0
+    # Calculate transcript metrics
+    respondent_dialogues = []
+    respondent_word_counts = []
+    interviewer_dialogues = []
+    transcript_lines = []
     
     # Get interview participants and topic from analyst
     interviewer_name = "IDI Interviewer"
     respondent_name = respondent_data.get('name', 'Respondent')
     topic = analyst.topic
     target_audience = analyst.target_audience
+
+    # Format the analyst's transcript and split each speaker's turns into columns in one pass
+    for speaker, dialogue, word_count in transcript:
+        transcript_lines.append(f"{speaker}: {dialogue}")
+        if speaker == respondent_name:
+            respondent_dialogues.append(dialogue)
+            respondent_word_counts.append(word_count)
+        elif speaker == interviewer_name:
+            interviewer_dialogues.append(dialogue)
+
+    # Respondent metrics run over the respondent's dialogue column alone
+    respondent_turn_counter = len(respondent_dialogues)
+    respondent_word_count = sum(respondent_word_counts)
+    # Exact hesitation marker (um, uh, hmm, like, you know, etc.) and vocabulary counts
+    hesitation_markers = sum(len(_HESITATION_RE.findall(dialogue)) for dialogue in respondent_dialogues)
+    respondent_vocabulary = {word for dialogue in respondent_dialogues for word in _VOCABULARY_RE.findall(dialogue.lower())}
+
+    response_metrics = {
+        "avg_response_length_words": int(respondent_word_count / respondent_turn_counter) if respondent_turn_counter > 0 else 0,
+        "total_respondent_word_count": respondent_word_count,
+        "estimated_hesitation_markers": hesitation_markers,
+        "unique_word_count": len(respondent_vocabulary),
+        "question_types": _classify_questions(interviewer_dialogues),
+    }
     
-    # Process transcript metrics
-    formatted_transcript = []
-    for speaker, dialogue in transcript:
-        formatted_transcript.append(f"{speaker}: {dialogue}")
-        
-        # Calculate metrics if this is a respondent turn
-        if respondent_name in speaker:
-            respondent_turn_counter += 1
-            words = dialogue.split()
-            respondent_word_count += len(words)
-            
-            # Count hesitation markers (um, uh, hmm, well, etc.)
-            hesitation_patterns = ['um', 'uh', 'hmm', 'er', 'ah', 'like', 'you know']
-            for pattern in hesitation_patterns:
-                hesitation_markers += sum(1 for word in words if word.lower() == pattern)
-    
-    full_transcript_str = "\n".join(formatted_transcript)
+    full_transcript_str = "\n".join(transcript_lines)
     
     # Create context on respondent for the analysis
-    respondent_context = f"**Respondent Information:**\n```json\n{json.dumps(respondent_data, indent=2)}\n```\n---" # Format as JSON for clarity
+    respondent_context = f"**Respondent Information:**\n```json\n{orjson.dumps(respondent_data, option=orjson.OPT_INDENT_2 | orjson.OPT_SORT_KEYS).decode()}\n```\n---" # Format as JSON for clarity; sorted keys keep the prompt byte-stable for the same persona
 
-    analysis_prompt = f"""Please perform a detailed analysis of the following in-depth interview transcript regarding '{topic}' with target audience '{target_audience}'. Follow your instructions meticulously. Calculate all metrics and sentiment distributions based *only* on the provided transcript text.
+    analysis_prompt = f"""Please perform a detailed analysis of the following in-depth interview transcript regarding '{topic}' with target audience '{target_audience}'. Follow your instructions meticulously. Calculate all sentiment distributions based *only* on the provided transcript text.
 
 {respondent_context}
 
@@ -522,75 +789,327 @@ async def analyze_interview(analyst: AnalystAgent, transcript: List[Tuple[str, s
 {full_transcript_str}
 ```
 
+**PRE-CALCULATED RESPONSE METRICS (exact counts from the transcript):**
+- Respondent turns: {respondent_turn_counter}
+- Average response length: {response_metrics["avg_response_length_words"]} words
+- Total respondent words: {respondent_word_count}
+- Hesitation markers (um, uh, hmm, like, you know, ...): {hesitation_markers}
+- Unique words used: {response_metrics["unique_word_count"]}
+
 **Output Requirements:**
-1.  Provide your full narrative analysis report (Executive Summary, Themes, Sentiment, Insights, etc.).
-2.  At the VERY END of your response, include the MANDATORY JSON block containing the accurately calculated metrics ('sentiment_breakdown', 'key_themes', 'response_metrics', 'sentiment_by_turn') as specified in your instructions. Ensure all values in the JSON are calculated *directly* from the transcript."""
-    
-    result = await Runner.run(analyst, analysis_prompt)
-    analysis_text = result.final_output.strip()
+1.  Provide your full narrative analysis report (Executive Summary, Themes, Sentiment, Insights, etc.) as the `narrative`.
+2.  Provide the accurately calculated 'key_themes' and 'sentiment_by_turn' as the `structured` data, as specified in your instructions. Ensure all values are calculated *directly* from the transcript."""
 
-    # --- Extract and Validate JSON block ---
-    narrative_analysis = analysis_text # Default to full text
+    # The analyst returns a validated AnalystOutput, so there is no JSON block to locate and parse
     analysis_json_parsed = None
+    try:
+        result = await cached_run(analyst, analysis_prompt)
+        narrative_analysis = result.final_output.narrative.strip()
+        analysis_json_parsed = result.final_output.structured.model_dump()
+        print("STREAM: Received structured analysis output.", flush=True)
+    except Exception as e:
+        print(f"STREAM: Warning - Analyst did not return a valid structured analysis: {e}. Using defaults.", flush=True)
+        narrative_analysis = f"Analysis could not be completed: {e}"
 
-    json_match = re.search(r'```json\s*(\{.*?\})\s*```', analysis_text, re.DOTALL | re.IGNORECASE)
-
-    if json_match:
-        json_string = json_match.group(1).strip()
-        try:
-            analysis_json_parsed = json.loads(json_string)
-            # Basic structural validation of the parsed JSON
-            required_json_keys = ["sentiment_breakdown", "key_themes", "response_metrics", "sentiment_by_turn"]
-            if all(key in analysis_json_parsed for key in required_json_keys):
-                 # Remove JSON block from narrative
-                 narrative_analysis = analysis_text.replace(json_match.group(0), '').strip()
-                 print("STREAM: Extracted and validated analysis JSON block structure.", flush=True)
-            else:
-                 missing_keys = [key for key in required_json_keys if key not in analysis_json_parsed]
-                 print(f"STREAM: Warning - Parsed analysis JSON is missing required keys: {missing_keys}. JSON block kept in narrative.", flush=True)
-                 analysis_json_parsed = {"error": "JSON structure validation failed", "missing_keys": missing_keys}
-
-        except json.JSONDecodeError as e:
-            print(f"STREAM: Warning - Failed to parse analysis JSON: {e}. JSON block kept in narrative.", flush=True)
-            analysis_json_parsed = {"error": f"JSON parsing failed: {e}", "raw_json_string": json_string}
-    else:
-        print("STREAM: Warning - Analysis JSON block not found in analyst output. Using defaults.", flush=True)
-
-    # If JSON parsing/validation failed, create a default structure with calculated metrics
-    if analysis_json_parsed is None or "error" in analysis_json_parsed:
-         print("STREAM: Populating analysis JSON with calculated defaults due to extraction/validation issues.", flush=True)
+    # If the analyst call failed, create a default structure
+    if analysis_json_parsed is None:
+         print("STREAM: Populating analysis JSON with calculated defaults.", flush=True)
          analysis_json_parsed = {
-             "sentiment_breakdown": {"positive": 0, "neutral": 100, "negative": 0}, # Default neutral if not calculated
              "key_themes": [{"theme": "Analysis Incomplete", "prominence": 50, "sentiment": "Neutral", "description": "Analyst failed to extract themes.", "example_quote": ""}],
-             "response_metrics": {
-                 "avg_response_length_words": int(respondent_word_count / max(1, respondent_turn_counter)) if respondent_turn_counter > 0 else 0,
-                 "total_respondent_word_count": respondent_word_count,
-                 "estimated_hesitation_markers": hesitation_markers
-             },
              "sentiment_by_turn": [{"turn_number": i+1, "sentiment": "Unknown", "topic_discussed": "Analysis Incomplete"} for i in range(respondent_turn_counter)]
          }
 
+    # Response metrics always come from the exact local counts, and the overall sentiment
+    # distribution is aggregated from the per-turn classifications so the two charts agree
+    analysis_json_parsed["response_metrics"] = response_metrics
+    analysis_json_parsed["sentiment_breakdown"] = _sentiment_breakdown(analysis_json_parsed["sentiment_by_turn"])
+
     print("STREAM: Analysis Complete.", flush=True)
     return narrative_analysis, analysis_json_parsed # Return parsed/default JSON
 
 
 # ... existing code ...
 
-def generate_report(analysis: str, parameters: Dict[str, Any], transcript: List[Tuple[str, str]], 
-                   visualization_data: Dict[str, Any], respondent_data: Dict[str, Any], simulation_id: str):
-    """Generates and saves the final report with visualizations to the simulation-specific directory."""
+# Resolution of the report charts; IDI_CHART_DPI overrides it for higher-resolution PNGs
+CHART_DPI = env_number("IDI_CHART_DPI", 120, minimum=30, maximum=1200)
+
+def _save_chart(fig, path: str, dpi: int = CHART_DPI) -> None:
+    """
+    Renders a figure once and writes its pixel buffer straight to an RGB PNG,
+    skipping savefig's print pipeline and the alpha channel the charts never use.
+    """
+    import numpy as np
+    from PIL import Image
+
+    fig.set_dpi(dpi)
+    fig.canvas.draw()
+    Image.fromarray(np.asarray(fig.canvas.buffer_rgba())[..., :3]).save(path, compress_level=3)
+
+SENTIMENT_VALUE = {"positive": 1, "negative": -1, "neutral": 0}
+SENTIMENT_COLOR = {"positive": '#99ff99', "negative": '#ff9999', "neutral": '#66b3ff'}
+
+def _sentiment_key(sentiment: Any) -> str:
+    """Normalizes a sentiment label to positive/negative/neutral, defaulting to neutral."""
+    if sentiment in SENTIMENT_VALUE: # Already canonical, as most analyst labels are
+        return sentiment
+    return _normalize_sentiment_label(str(sentiment))
+
+@functools.lru_cache(maxsize=64)
+def _normalize_sentiment_label(label: str) -> str:
+    # The analyst reuses a handful of labels, so each distinct one is lowercased and searched once
+    key = label.strip().lower()
+    if key in SENTIMENT_VALUE:
+        return key
+    # Free-form labels such as "Mostly positive"
+    if "positive" in key: return "positive"
+    if "negative" in key: return "negative"
+    return "neutral"
+
+def _new_figure(figsize: Tuple[float, float]) -> Tuple[Any, Any]:
+    """
+    Creates an Agg-backed figure and its axes without going through pyplot's global state.
+    matplotlib is imported here, lazily, because it adds hundreds of ms of start-up and the
+    renderers may run in worker processes.
+    """
+    from matplotlib.figure import Figure
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+    fig = Figure(figsize=figsize)
+    FigureCanvasAgg(fig)
+    return fig, fig.add_subplot(111)
+
+def _render_pie(data: Dict[str, Any], path: str, title: str, colors: List[str], startangle: int,
+                explode_key: Optional[str] = None, shadow: bool = False) -> Optional[str]:
+    """Draws a labelled percentage pie of data's values; returns path, or None when there is nothing to plot."""
+    # Ensure data has values before plotting
+    if not data or not any(data.values()):
+        return None
+    fig, ax = _new_figure((10, 7))
+    labels = list(data.keys())
+    sizes = [float(v) for v in data.values()] # Ensure float
+    # Pull out the explode_key slice, if present
+    explode = tuple(0.1 if label == explode_key else 0 for label in labels) if explode_key else None
+
+    ax.pie(sizes, explode=explode, labels=labels, colors=colors,
+           autopct='%1.1f%%', shadow=shadow, startangle=startangle)
+    ax.axis('equal') 
+    ax.set_title(title, fontsize=16)
+
+    _save_chart(fig, path)
+    return path
+
+def _render_sentiment_pie(sentiment_data: Dict[str, Any], path: str) -> Optional[str]:
+    """Draws the overall sentiment pie chart; returns its path, or None when there is nothing to plot."""
+    return _render_pie(sentiment_data, path, 'Overall Sentiment Distribution',
+                       [SENTIMENT_COLOR[_sentiment_key(label)] for label in sentiment_data], # Same colours as the themes chart
+                       startangle=140, explode_key='positive', shadow=True)
+
+# Textual prominence levels, checked in order, and the bar height each one maps to
+_PROMINENCE_LEVELS = (("high", 75), ("medium", 50), ("low", 25))
+
+def _theme_metric(item: Dict[str, Any]) -> float:
+    """Bar height for a theme: its numeric frequency or prominence, a percentage or level named in the prominence text, else 50."""
+    frequency = item.get("frequency")
+    if isinstance(frequency, (int, float)):
+        return frequency
+    if "prominence" not in item:
+        return 50
+    prominence = item["prominence"]
+    if isinstance(prominence, (int, float)):
+        return prominence
+    prominence = str(prominence)
+    match = _PERCENT_RE.search(prominence)
+    if match:
+        return int(match.group(1))
+    prominence = prominence.lower()
+    return next((value for level, value in _PROMINENCE_LEVELS if level in prominence), 50)
+
+def _render_key_themes(themes_data: List[Dict[str, Any]], path: str) -> Optional[str]:
+    """Draws the key themes bar chart coloured by sentiment; returns its path, or None when there is nothing to plot."""
+    # Themes that have at least a theme name, with their sentiment and bar height
+    named_themes = [item for item in themes_data if "theme" in item]
+    valid_themes = [item["theme"] for item in named_themes]
+    sentiments = [item.get("sentiment", "Neutral") for item in named_themes]
+    metrics = [_theme_metric(item) for item in named_themes]
+    
+    if not valid_themes:
+        return None
+    fig, ax = _new_figure((12, 8))
+    
+    import numpy as np
+    from matplotlib.colors import to_rgba_array
+
+    # Index a 3-colour RGBA palette with one small int array rather than passing per-bar colour strings
+    palette = to_rgba_array(list(SENTIMENT_COLOR.values()))
+    palette_index = {key: i for i, key in enumerate(SENTIMENT_COLOR)}
+    color_index = np.fromiter((palette_index[_sentiment_key(sentiment)] for sentiment in sentiments),
+                              dtype=np.int8, count=len(sentiments))
+    colors = palette[color_index]
+    
+    bars = ax.bar(valid_themes, metrics, color=colors)
+    ax.bar_label(bars, labels=[str(metric) for metric in metrics], padding=3)
+
+    ax.set_xlabel('Themes', fontsize=14)
+    ax.set_ylabel('Frequency/Prominence', fontsize=14)
+    ax.set_title('Key Themes with Sentiment', fontsize=16)
+    ax.tick_params(axis='x', labelrotation=45, labelsize=12)
+    for tick_label in ax.get_xticklabels():
+        tick_label.set_horizontalalignment('right')
+    
+    from matplotlib.patches import Patch
+    legend_elements = [
+        Patch(facecolor=SENTIMENT_COLOR["positive"], label='Positive'),
+        Patch(facecolor=SENTIMENT_COLOR["neutral"], label='Neutral'),
+        Patch(facecolor=SENTIMENT_COLOR["negative"], label='Negative')]
+    ax.legend(handles=legend_elements, title="Sentiment")
+    
+    fig.tight_layout()
+    
+    _save_chart(fig, path)
+    return path
+
+def _render_question_types(question_types: Dict[str, Any], path: str) -> Optional[str]:
+    """Draws the interviewer question type pie chart; returns its path, or None when there is nothing to plot."""
+    return _render_pie(question_types, path, 'Interviewer Question Type Distribution',
+                       ['#ffcc99','#66b3ff','#99ff99'], # Open, Closed, Probing? Adjust as needed
+                       startangle=90)
+
+def _render_sentiment_flow(sentiment_by_turn: List[Dict[str, Any]], path: str) -> Optional[str]:
+    """Draws respondent sentiment across the interview turns; returns its path, or None when there is nothing to plot."""
+    if not sentiment_by_turn: # Only plot if there's data
+        return None
+    import numpy as np
+
+    sentiment_flow = sorted(sentiment_by_turn, key=lambda x: x["turn_number"])
+    # One pass into an (n, 2) array of turn number and sentiment score columns
+    flow = np.array([(item["turn_number"], SENTIMENT_VALUE[_sentiment_key(item["sentiment"])]) for item in sentiment_flow],
+                    dtype=np.int32)
+    q_numbers, sentiment_values = flow[:, 0], flow[:, 1]
+    topics = [item.get("topic", f"Q{item['turn_number']}") for item in sentiment_flow] # Use topic if available
+
+    fig, ax = _new_figure((14, 8))
+    ax.plot(q_numbers, sentiment_values, marker='o', linestyle='-', linewidth=2, markersize=8)
+    ax.axhline(y=0, color='gray', linestyle='--', alpha=0.7)
+
+    for (q_number, sentiment_value), topic in zip(flow.tolist(), topics):
+        ax.annotate(topic, (q_number, sentiment_value), xytext=(5, 5), textcoords='offset points', fontsize=9)
+
+    ax.set_xlabel('Question Turn', fontsize=14)
+    ax.set_ylabel('Sentiment Score', fontsize=14)
+    ax.set_title('Sentiment Flow Through Interview', fontsize=16)
+    ax.set_yticks([-1, 0, 1], ['Negative', 'Neutral', 'Positive'])
+    ax.set_xticks(np.arange(q_numbers.min(), q_numbers.max() + 1)) # Ensure integer ticks
+    ax.grid(True, alpha=0.3)
+    fig.tight_layout()
+
+    _save_chart(fig, path)
+    return path
+
+# Output file name of each report chart, shared by the renderer call and the markdown link
+CHART_FILENAMES = {
+    "sentiment pie": "sentiment_pie_chart.png",
+    "key themes": "key_themes_chart.png",
+    "question types": "question_types.png",
+    "sentiment flow": "sentiment_flow.png",
+}
+
+# Chart worker processes, started on first use and shared by every report in the run, so a
+# batch pays the process start-up and matplotlib import once rather than per report. By then
+# asyncio.to_thread workers are running, and forking a multi-threaded process can deadlock, so
+# workers come from a forkserver instead.
+_chart_pool = None
+
+def _get_chart_pool(max_workers: int):
+    global _chart_pool
+    if _chart_pool is None:
+        import multiprocessing
+        from concurrent.futures import ProcessPoolExecutor
+        _chart_pool = ProcessPoolExecutor(max_workers=max_workers, mp_context=multiprocessing.get_context("forkserver"))
+    return _chart_pool
+
+async def _render_charts(jobs: List[Tuple[Any, Any, str]], parallel: bool = True) -> List[Any]:
+    """
+    Runs each (renderer, data, path) job and returns its outcome in job order: the chart path,
+    None when skipped, or the exception it raised. matplotlib isn't thread-safe, so charts are
+    drawn in separate worker processes unless parallel is False (--singlecore) or there is
+    only one CPU to run them on. Worker renders are awaited, leaving the event loop free for
+    other interviews in a batch.
+    """
+    max_workers = min(4, os.cpu_count() or 1)
+    if not parallel or max_workers < 2:
+        outcomes = []
+        try:
+            for renderer, data, path in jobs:
+                try:
+                    outcomes.append(renderer(data, path))
+                except Exception as e:
+                    outcomes.append(e)
+        finally:
+            # Figures hold reference cycles with their artists, so in-process renders are only
+            # freed by the cycle collector; collect now to keep memory flat across batch runs
+            gc.collect()
+        return outcomes
+
+    loop = asyncio.get_running_loop()
+    pool = _get_chart_pool(max_workers)
+    return list(await asyncio.gather(*(loop.run_in_executor(pool, renderer, data, path)
+                                       for renderer, data, path in jobs), return_exceptions=True))
+
+# Report files are written to a .tmp sibling and swapped in with os.replace, so a crashed
+# simulation never leaves a half-written report.md or transcript.csv behind
+
+def _write_transcript_csv(path: str, transcript: List[Tuple[str, str, int]]) -> None:
+    import csv
+
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", newline='', encoding='utf-8', buffering=1 << 16) as f:
+        writer = csv.writer(f)
+        writer.writerow(["Speaker", "Dialogue"])
+        writer.writerows((speaker, dialogue) for speaker, dialogue, _ in transcript)
+    os.replace(tmp_path, path)
+
+def _write_text(path: str, parts: Iterable[str]) -> None:
+    """Streams text parts through one buffered handle, so the whole document is never joined in memory."""
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding='utf-8', buffering=1 << 16) as f:
+        f.writelines(parts)
+    os.replace(tmp_path, path)
+
+def _start_transcript_csv(path: str, transcript: List[Tuple[str, str, int]]) -> asyncio.Task:
+    """Starts writing the transcript CSV in a worker thread and returns the task to await."""
+    return asyncio.create_task(asyncio.to_thread(_write_transcript_csv, path, transcript))
+
+def _profile_sections(respondent_data: Dict[str, Any]) -> Dict[str, str]:
+    """Serializes the potentially nested persona profile sections once, compactly with sorted keys."""
+    return {key: orjson.dumps(respondent_data.get(key, {}), option=orjson.OPT_SORT_KEYS).decode()
+            for key in ("demographics", "psychographics", "behaviors", "attitudes")}
+
+async def generate_report(analysis: str, parameters: Dict[str, Any], transcript: List[Tuple[str, str, int]], 
+                          visualization_data: Dict[str, Any], respondent_data: Dict[str, Any], simulation_id: str,
+                          csv_task: Optional[asyncio.Task] = None, profile_sections: Optional[Dict[str, str]] = None):
+    """
+    Generates and saves the final report with visualizations to the simulation-specific directory.
+    The transcript CSV is written in a worker thread while the charts render, unless the caller
+    already started that write (csv_task) earlier. Likewise, profile_sections may be passed in if
+    the caller already serialized them.
+    """
     current_timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
     print(f"\n--- Generating Report for IDI Simulation ID: {simulation_id} ---")
     
     # --- Define Paths ---
-    base_output_dir = os.path.join("openai-simulations-ui", "public", "simulations", "idi", simulation_id)
+    base_output_dir = os.path.join(IDI_OUTPUT_ROOT, simulation_id)
     viz_dir = os.path.join(base_output_dir, "visualizations")
     viz_rel_path_prefix = f"/simulations/idi/{simulation_id}/visualizations" # Relative path for markdown links
-    os.makedirs(viz_dir, exist_ok=True)
+    await asyncio.to_thread(_ensure_dir, viz_dir)
     print(f"Output directory ensured: {base_output_dir}")
     # --- End Define Paths ---
 
-    report_content = f"""# In-Depth Interview Report
+    transcript_filename = os.path.join(base_output_dir, "transcript.csv")
+    if csv_task is None:
+        csv_task = _start_transcript_csv(transcript_filename, transcript)
+
+    try:
+        report_parts = [f"""# In-Depth Interview Report
 
 ## 1. Study Parameters
 - **Topic:** {parameters['topic']}
@@ -600,252 +1119,188 @@ def generate_report(analysis: str, parameters: Dict[str, Any], transcript: List[
 - **Date/Time:** {current_timestamp}
 
 ## 2. Respondent Profile
-"""
-    # Add respondent profile to the report
-    report_content += f"### {respondent_data.get('name', 'Unknown')}\n"
-    report_content += f"- **Age:** {respondent_data.get('age', 'Unknown')}\n"
-    report_content += f"- **Occupation:** {respondent_data.get('occupation', 'Unknown')}\n"
-    report_content += f"- **Education:** {respondent_data.get('education', 'Unknown')}\n"
-    report_content += f"- **Location:** {respondent_data.get('location', 'Unknown')}\n"
-    # Use json.dumps for potentially nested dicts
-    report_content += f"- **Demographics:** {json.dumps(respondent_data.get('demographics', {}))}\n" 
-    report_content += f"- **Psychographics:** {json.dumps(respondent_data.get('psychographics', {}))}\n"
-    report_content += f"- **Relevant Behaviors:** {json.dumps(respondent_data.get('behaviors', {}))}\n"
-    report_content += f"- **Relevant Attitudes:** {json.dumps(respondent_data.get('attitudes', {}))}\n"
-    report_content += f"- **Topic Experience:** {respondent_data.get('topic_experience', 'N/A')}\n\n"
+"""]
+        if profile_sections is None:
+            profile_sections = _profile_sections(respondent_data)
+
+        # Add respondent profile to the report
+        report_parts.append(f"### {respondent_data.get('name', 'Unknown')}\n")
+        report_parts.append(f"- **Age:** {respondent_data.get('age', 'Unknown')}\n")
+        report_parts.append(f"- **Occupation:** {respondent_data.get('occupation', 'Unknown')}\n")
+        report_parts.append(f"- **Education:** {respondent_data.get('education', 'Unknown')}\n")
+        report_parts.append(f"- **Location:** {respondent_data.get('location', 'Unknown')}\n")
+        report_parts.append(f"- **Demographics:** {profile_sections['demographics']}\n") 
+        report_parts.append(f"- **Psychographics:** {profile_sections['psychographics']}\n")
+        report_parts.append(f"- **Relevant Behaviors:** {profile_sections['behaviors']}\n")
+        report_parts.append(f"- **Relevant Attitudes:** {profile_sections['attitudes']}\n")
+        report_parts.append(f"- **Topic Experience:** {respondent_data.get('topic_experience', 'N/A')}\n\n")
     
-    report_content += f"""
+        report_parts.append(f"""
 ## 3. Analysis Results
 {analysis}
 
 ## 4. Visualizations
 *See attached visualization files referenced below*
 
-"""
+""")
     
-    # Generate visualizations if data is available
-    visualization_files = []
-    if visualization_data:
-        print(f"Generating visualizations in {viz_dir}...")
-        
-        # 1. Sentiment Breakdown Pie Chart
-        if "sentiment_breakdown" in visualization_data:
-            try: # Add try-except for robustness
-                sentiment_data = visualization_data["sentiment_breakdown"]
-                # Ensure data has values before plotting
-                if sentiment_data and any(sentiment_data.values()):
-                    plt.figure(figsize=(10, 7))
-                    labels = list(sentiment_data.keys())
-                    sizes = [float(v) for v in sentiment_data.values()] # Ensure float
-                    colors = ['#66b3ff', '#99ff99', '#ff9999'] # Neutral, Positive, Negative order? Adjust if needed
-                    # Find positive index for explode, handle missing keys
-                    pos_index = labels.index('positive') if 'positive' in labels else -1
-                    explode = tuple(0.1 if i == pos_index else 0 for i in range(len(labels))) 
-            
-                    plt.pie(sizes, explode=explode, labels=labels, colors=colors,
-                            autopct='%1.1f%%', shadow=True, startangle=140)
-                    plt.axis('equal') 
-                    plt.title('Overall Sentiment Distribution', fontsize=16)
-            
-                    pie_file = os.path.join(viz_dir, "sentiment_pie_chart.png")
-                    plt.savefig(pie_file, dpi=300)
-                    plt.close()
-                    visualization_files.append(os.path.basename(pie_file))
-                    report_content += f"![Sentiment Distribution]({viz_rel_path_prefix}/sentiment_pie_chart.png)\n\n"
-                else:
-                    print("Skipping sentiment pie chart: No data or all values are zero.")
-            except Exception as e:
-                print(f"Error generating sentiment pie chart: {e}")
-        
-        # 2. Key Themes Bar Chart
-        if "key_themes" in visualization_data and visualization_data["key_themes"]:
-            try:
-                themes_data = visualization_data["key_themes"]
-                # Extract themes that have at least a theme name
-                valid_themes = [item["theme"] for item in themes_data if "theme" in item]
-                
-                # Get metrics and sentiments with fallbacks
-                metrics = []
-                sentiments = []
-                
-                for item in themes_data:
-                    if "theme" not in item:
-                        continue
-                        
-                    # Get sentiment with fallback
-                    sentiment = item.get("sentiment", "Neutral")
-                    sentiments.append(sentiment)
-                    
-                    # Try different metric keys with fallbacks
-                    if "frequency" in item and isinstance(item["frequency"], (int, float)):
-                        metrics.append(item["frequency"])
-                    elif "prominence" in item:
-                        # Try to extract numeric value from prominence
-                        prominence = item["prominence"]
-                        if isinstance(prominence, (int, float)):
-                            metrics.append(prominence)
-                        else:
-                            # Try to extract percentage
-                            match = re.search(r'(\d+)%', str(prominence))
-                            if match:
-                                metrics.append(int(match.group(1)))
-                            # Extract textual prominence levels
-                            elif "high" in str(prominence).lower():
-                                metrics.append(75)
-                            elif "medium" in str(prominence).lower():
-                                metrics.append(50)
-                            elif "low" in str(prominence).lower():
-                                metrics.append(25)
-                            else:
-                                metrics.append(50)  # Default value
-                    else:
-                        # Default value
-                        metrics.append(50)
-                
-                # Only proceed if we have valid data
-                if valid_themes and len(valid_themes) == len(metrics) == len(sentiments):
-                    plt.figure(figsize=(12, 8))
-                    
-                    colors = []
-                    for sentiment in sentiments:
-                        s_lower = str(sentiment).lower()
-                        if "positive" in s_lower: colors.append('#99ff99')
-                        elif "negative" in s_lower: colors.append('#ff9999')
-                        else: colors.append('#66b3ff') # Default to neutral
-                    
-                    bars = plt.bar(valid_themes, metrics, color=colors)
-                    
-                    for bar in bars:
-                        height = bar.get_height()
-                        plt.text(bar.get_x() + bar.get_width()/2., height, f'{height}', ha='center', va='bottom')
-            
-                    plt.xlabel('Themes', fontsize=14)
-                    plt.ylabel('Frequency/Prominence', fontsize=14)
-                    plt.title('Key Themes with Sentiment', fontsize=16)
-                    plt.xticks(rotation=45, ha='right', fontsize=12)
-                    
-                    from matplotlib.patches import Patch
-                    legend_elements = [
-                        Patch(facecolor='#99ff99', label='Positive'),
-                        Patch(facecolor='#66b3ff', label='Neutral'),
-                        Patch(facecolor='#ff9999', label='Negative')]
-                    plt.legend(handles=legend_elements, title="Sentiment")
-                    
-                    plt.tight_layout()
-                    
-                    themes_file = os.path.join(viz_dir, "key_themes_chart.png")
-                    plt.savefig(themes_file, dpi=300)
-                    plt.close()
-                    visualization_files.append(os.path.basename(themes_file))
-                    report_content += f"![Key Themes]({viz_rel_path_prefix}/key_themes_chart.png)\n\n"
+        # Generate visualizations if data is available
+        visualization_files = []
+        # (chart name, renderer, data, markdown alt text, message when there is nothing to plot), in report order
+        chart_jobs = []
+        if visualization_data:
+            if "sentiment_breakdown" in visualization_data:
+                chart_jobs.append(("sentiment pie", _render_sentiment_pie, visualization_data["sentiment_breakdown"],
+                                   "Sentiment Distribution", "Skipping sentiment pie chart: No data or all values are zero."))
+            if "key_themes" in visualization_data and visualization_data["key_themes"]:
+                chart_jobs.append(("key themes", _render_key_themes, visualization_data["key_themes"],
+                                   "Key Themes", "Skipping key themes chart: No themes with a name."))
+            if "response_metrics" in visualization_data and "question_types" in visualization_data["response_metrics"]:
+                chart_jobs.append(("question types", _render_question_types, visualization_data["response_metrics"]["question_types"],
+                                   "Question Types", "Skipping question types chart: No data or all values zero."))
+            if "sentiment_by_turn" in visualization_data and visualization_data["sentiment_by_turn"]:
+                chart_jobs.append(("sentiment flow", _render_sentiment_flow, visualization_data["sentiment_by_turn"],
+                                   "Sentiment Flow", "Skipping sentiment flow chart: No question data."))
+        # Degenerate analysis data leaves nothing to draw; skip the renderers and their matplotlib start-up
+        if chart_jobs:
+            print(f"Generating visualizations in {viz_dir}...")
+            outcomes = await _render_charts([(renderer, data, os.path.join(viz_dir, CHART_FILENAMES[chart_name]))
+                                       for chart_name, renderer, data, _, _ in chart_jobs],
+                                      parallel=not parameters.get("singlecore", False))
+            for (chart_name, _, _, alt_text, skip_message), outcome in zip(chart_jobs, outcomes):
+                if isinstance(outcome, Exception):
+                    print(f"Error generating {chart_name} chart: {outcome}")
+                elif outcome is None:
+                    print(skip_message)
                 else:
-                    print(f"Skipping key themes chart: Mismatched data lengths - themes: {len(valid_themes)}, metrics: {len(metrics)}, sentiments: {len(sentiments)}")
-            except Exception as e:
-                print(f"Error generating key themes chart: {e}")
-                import traceback
-                traceback.print_exc() # More detailed error information
-        
-        # 3. Question Type Breakdown
-        if "response_metrics" in visualization_data and "question_types" in visualization_data["response_metrics"]:
-            try:
-                question_types = visualization_data["response_metrics"]["question_types"]
-                if question_types and any(question_types.values()):
-                    plt.figure(figsize=(10, 7))
-                    labels = list(question_types.keys())
-                    sizes = [float(v) for v in question_types.values()]
-                    colors = ['#ffcc99','#66b3ff','#99ff99'] # Open, Closed, Probing? Adjust as needed
-                
-                    plt.pie(sizes, labels=labels, colors=colors, autopct='%1.1f%%', startangle=90)
-                    plt.axis('equal')
-                    plt.title('Interviewer Question Type Distribution', fontsize=16)
-                
-                    question_file = os.path.join(viz_dir, "question_types.png")
-                    plt.savefig(question_file, dpi=300)
-                    plt.close()
-                    visualization_files.append(os.path.basename(question_file))
-                    report_content += f"![Question Types]({viz_rel_path_prefix}/question_types.png)\n\n"
-                else:
-                    print("Skipping question types chart: No data or all values zero.")
-            except Exception as e:
-                print(f"Error generating question types chart: {e}")
-        
-        # 4. Sentiment Flow Through Interview
-        if "sentiment_by_turn" in visualization_data and visualization_data["sentiment_by_turn"]:
-            try:
-                sentiment_flow = visualization_data["sentiment_by_turn"]
-                sentiment_flow = sorted(sentiment_flow, key=lambda x: x["turn_number"])
-                
-                q_numbers = [item["turn_number"] for item in sentiment_flow]
-                sentiments = [item["sentiment"] for item in sentiment_flow]
-                topics = [item.get("topic", f"Q{item['turn_number']}") for item in sentiment_flow] # Use topic if available
-                
-                sentiment_values = []
-                for sentiment in sentiments:
-                    s_lower = str(sentiment).lower()
-                    if "positive" in s_lower: sentiment_values.append(1)
-                    elif "negative" in s_lower: sentiment_values.append(-1)
-                    else: sentiment_values.append(0) # Default neutral
-                
-                if q_numbers: # Only plot if there's data
-                    plt.figure(figsize=(14, 8))
-                    plt.plot(q_numbers, sentiment_values, marker='o', linestyle='-', linewidth=2, markersize=8)
-                    plt.axhline(y=0, color='gray', linestyle='--', alpha=0.7)
-                
-                    for i, topic in enumerate(topics):
-                        plt.annotate(topic, (q_numbers[i], sentiment_values[i]), xytext=(5, 5), textcoords='offset points', fontsize=9)
-                
-                    plt.xlabel('Question Turn', fontsize=14)
-                    plt.ylabel('Sentiment Score', fontsize=14)
-                    plt.title('Sentiment Flow Through Interview', fontsize=16)
-                    plt.yticks([-1, 0, 1], ['Negative', 'Neutral', 'Positive'])
-                    plt.xticks(np.arange(min(q_numbers), max(q_numbers)+1, 1)) # Ensure integer ticks
-                    plt.grid(True, alpha=0.3)
-                    plt.tight_layout()
-                
-                    flow_file = os.path.join(viz_dir, "sentiment_flow.png")
-                    plt.savefig(flow_file, dpi=300)
-                    plt.close()
-                    visualization_files.append(os.path.basename(flow_file))
-                    report_content += f"![Sentiment Flow]({viz_rel_path_prefix}/sentiment_flow.png)\n\n"
-                else:
-                    print("Skipping sentiment flow chart: No question data.")
-            except Exception as e:
-                print(f"Error generating sentiment flow chart: {e}")
+                    chart_filename = CHART_FILENAMES[chart_name]
+                    visualization_files.append(chart_filename)
+                    report_parts.append(f"![{alt_text}]({viz_rel_path_prefix}/{chart_filename})\n\n")
     
-    report_content += """
+        report_parts.append("""
 ## 5. Full Transcript
-"""
-    for speaker, dialogue in transcript:
-        report_content += f"- **{speaker}:** {dialogue}\n\n"
-
-    # --- Save Report and Transcript ---
-    report_filename = os.path.join(base_output_dir, "report.md")
-    with open(report_filename, "w", encoding='utf-8') as f:
-        f.write(report_content)
-    print(f"Report saved successfully as: {report_filename}")
+""")
+        # The transcript lines, the bulk of the report, are formatted as the writer consumes them
+        transcript_lines = (f"- **{speaker}:** {dialogue}\n\n" for speaker, dialogue, _ in transcript)
+
+        # --- Save Report and Transcript ---
+        report_filename = os.path.join(base_output_dir, "report.md")
+        await asyncio.to_thread(_write_text, report_filename, itertools.chain(report_parts, transcript_lines))
+        print(f"Report saved successfully as: {report_filename}")
     
-    transcript_filename = os.path.join(base_output_dir, "transcript.csv")
-    with open(transcript_filename, "w", newline='', encoding='utf-8') as f:
-        writer = csv.writer(f)
-        writer.writerow(["Speaker", "Dialogue"])
-        for speaker, dialogue in transcript:
-            writer.writerow([speaker, dialogue])
-    print(f"Transcript saved successfully as: {transcript_filename}")
-    # --- End Save Report and Transcript ---
+        await csv_task
+        print(f"Transcript saved successfully as: {transcript_filename}")
+        # --- End Save Report and Transcript ---
     
-    if visualization_files:
-        print(f"Generated {len(visualization_files)} visualization files in {viz_dir}")
+        if visualization_files:
+            print(f"Generated {len(visualization_files)} visualization files in {viz_dir}")
+    finally:
+        # Settles the CSV write if an earlier step raised, without masking that error; a no-op otherwise
+        await asyncio.gather(csv_task, return_exceptions=True)
 
 
 # --- Main Execution ---
 
+async def run_simulation(params: Dict[str, Any], simulation_id: str, analyst: Optional[AnalystAgent] = None):
+    """
+    Runs the persona -> interview -> analysis -> report pipeline for a single respondent.
+    The analyst only depends on topic and audience, so a batch can pass in one shared instance.
+    """
+    # Pass simulation_id to persona generation; the analyst doesn't depend on the persona, so build it meanwhile
+    persona_task = asyncio.create_task(generate_respondent_persona(params["target_audience"], params["topic"], simulation_id))
+    if analyst is None:
+        analyst = AnalystAgent(topic=params["topic"], target_audience=params["target_audience"])
+    persona = await persona_task
+    
+    # Create respondent summary for interviewer (it lands in the interviewer's instructions, so serialize canonically)
+    psychographics = persona.get('psychographics', {})
+    # Ensure psychographics is a dict before attempting to stringify
+    # Slice the encoded bytes before decoding; "ignore" drops a multi-byte character cut at the boundary
+    psychographics_brief = orjson.dumps(psychographics, option=orjson.OPT_SORT_KEYS)[:150].decode(errors="ignore") if isinstance(psychographics, dict) else str(psychographics)[:150]
+    # Serialized once here for the interviewer's summary and reused by the report
+    profile_sections = _profile_sections(persona)
+    persona_summary = f"{persona.get('name', 'Unknown')}, {persona.get('age', 'Unknown')} year old {persona.get('occupation', 'professional')}. {profile_sections['demographics']}. Psychographics snippet: {psychographics_brief}..."
+    
+    # Create agents
+    interviewer = InterviewerAgent(
+        topic=params["topic"], respondent_profile=persona_summary, num_questions=params["num_questions"]
+    )
+    respondent = RespondentAgent(persona_data=persona, topic=params["topic"])
+
+    # Run the interview
+    transcript_log_path = os.path.join(IDI_OUTPUT_ROOT, simulation_id, "transcript.jsonl")
+    transcript = await run_interview(interviewer, respondent, params["num_questions"], transcript_log_path)
+
+    if transcript:
+        # The transcript CSV only needs the transcript, so write it while the analyst call is in flight
+        csv_task = _start_transcript_csv(os.path.join(IDI_OUTPUT_ROOT, simulation_id, "transcript.csv"), transcript)
+        try:
+            # Analyze the transcript
+            analysis, visualization_data = await analyze_interview(analyst, transcript, persona)
+
+            # Generate the report, passing simulation_id
+            await generate_report(analysis, params, transcript, visualization_data, persona, simulation_id, csv_task, profile_sections)
+        finally:
+            # generate_report awaits the CSV write, but the analyst call may fail before it runs
+            await asyncio.gather(csv_task, return_exceptions=True)
+    else:
+        print("Interview did not produce a transcript. Analysis skipped.")
+
+async def run_batch(params: Dict[str, Any], simulation_id: str, num_respondents: int) -> int:
+    """
+    Runs independent interviews for several respondents concurrently, each saved under
+    '<simulation_id>_<n>'. IDI_MAX_CONCURRENCY caps how many pipelines hit the API at once.
+    Returns how many of the interviews failed; a single interview's errors propagate instead.
+    """
+    if num_respondents <= 1:
+        await run_simulation(params, simulation_id)
+        return 0
+
+    semaphore = asyncio.Semaphore(MAX_CONCURRENCY)
+    # Stateless across runs, so every interview in the batch reuses one analyst
+    analyst = AnalystAgent(topic=params["topic"], target_audience=params["target_audience"])
+
+    async def run_one(respondent_number: int):
+        async with semaphore:
+            await run_simulation(params, f"{simulation_id}_{respondent_number}", analyst)
+
+    print(f"STREAM: Running {num_respondents} interviews concurrently...", flush=True)
+    results = await asyncio.gather(*(run_one(n) for n in range(1, num_respondents + 1)), return_exceptions=True)
+    failed = 0
+    for respondent_number, result in enumerate(results, start=1):
+        if isinstance(result, Exception):
+            failed += 1
+            print(f"STREAM: Error in interview {simulation_id}_{respondent_number}: {result}", flush=True)
+    print(f"STREAM: Batch finished: {num_respondents - failed} of {num_respondents} interviews completed, {failed} failed.", flush=True)
+    return failed
+
 async def main():
     """Main function to run the in-depth interview simulation."""
-    if not os.getenv("OPENAI_API_KEY"):
+    # Checked before anything else so a misconfigured environment fails before any work is done
+    if not os.environ.get("OPENAI_API_KEY"):
         print("Error: OPENAI_API_KEY environment variable not set.")
         sys.exit(1) # Exit if key is missing
 
     # --- Argument Parsing ---
+    import argparse
+
+    def bounded_int(low: int, high: int):
+        def parse(value: str) -> int:
+            try:
+                number = int(value)
+            except ValueError:
+                raise argparse.ArgumentTypeError(f"invalid int value: {value!r}")
+            if not low <= number <= high:
+                raise argparse.ArgumentTypeError(f"must be between {low} and {high}, got {number}")
+            return number
+        return parse
+
+    def simulation_id_type(value: str) -> str:
+        # The ID becomes an output directory name, so reject anything that could escape IDI_OUTPUT_ROOT
+        if not _SIMULATION_ID_RE.fullmatch(value):
+            raise argparse.ArgumentTypeError(f"may only contain letters, digits, '_' and '-', got {value!r}")
+        return value
+
     parser = argparse.ArgumentParser(description="Run a simulated in-depth interview.")
     parser.add_argument(
         "--topic", type=str, default="Mobile banking app user experience",
@@ -856,21 +1311,30 @@ async def main():
         help="Description of the target audience/personas."
     )
     parser.add_argument(
-        "--num_questions", type=int, default=8,
+        "--num_questions", type=bounded_int(2, 50), default=8,
         help="Number of main questions to include in the interview."
     )
     # --- Added simulation_id argument ---
     parser.add_argument(
-        "--simulation_id", type=str, required=True, 
+        "--simulation_id", type=simulation_id_type, required=True, 
         help="Unique ID for this simulation run."
     )
     # --- End Added argument ---
+    parser.add_argument(
+        "--num_respondents", type=bounded_int(1, 50), default=1,
+        help="Number of independent respondents to interview concurrently."
+    )
+    parser.add_argument(
+        "--singlecore", action="store_true",
+        help="Render report charts sequentially in this process instead of in parallel worker processes (useful for debugging)."
+    )
     args = parser.parse_args()
 
     params = {
         "topic": args.topic,
         "target_audience": args.target_audience,
-        "num_questions": args.num_questions
+        "num_questions": args.num_questions,
+        "singlecore": args.singlecore
     }
     simulation_id = args.simulation_id # Get the ID
 
@@ -879,35 +1343,26 @@ async def main():
     print(f"Topic: {params['topic']}")
     print(f"Target Audience: {params['target_audience']}")
     print(f"Number of Questions: {params['num_questions']}")
+    if args.num_respondents > 1:
+        print(f"Number of Respondents: {args.num_respondents}")
     print("-----------------------------")
 
-    # Pass simulation_id to persona generation
-    persona = await generate_respondent_persona(params["target_audience"], params["topic"], simulation_id)
-    
-    # Create respondent summary for interviewer
-    psychographics = persona.get('psychographics', {})
-    # Ensure psychographics is a dict before attempting to stringify
-    psychographics_brief = json.dumps(psychographics)[:150] if isinstance(psychographics, dict) else str(psychographics)[:150]
-    persona_summary = f"{persona.get('name', 'Unknown')}, {persona.get('age', 'Unknown')} year old {persona.get('occupation', 'professional')}. {json.dumps(persona.get('demographics', {}))}. Psychographics snippet: {psychographics_brief}..."
-    
-    # Create agents
-    interviewer = InterviewerAgent(
-        topic=params["topic"], respondent_profile=persona_summary, num_questions=params["num_questions"]
-    )
-    respondent = RespondentAgent(persona_data=persona, topic=params["topic"])
-    analyst = AnalystAgent(topic=params["topic"], target_audience=params["target_audience"])
-
-    # Run the interview
-    transcript = await run_interview(interviewer, respondent, params["num_questions"])
-
-    if transcript:
-        # Analyze the transcript
-        analysis, visualization_data = await analyze_interview(analyst, transcript, persona)
-        
-        # Generate the report, passing simulation_id
-        generate_report(analysis, params, transcript, visualization_data, persona, simulation_id)
-    else:
-        print("Interview did not produce a transcript. Analysis skipped.")
+    # One pooled client for every agent call, so turns and concurrent interviews reuse
+    # keep-alive connections instead of each run setting up a client of its own.
+    # Rate-limited (429) and transient errors are retried with exponential backoff, honouring Retry-After.
+    # A short connect timeout fails over to a retry quickly when a connection can't be established,
+    # while reads keep the long timeout that slow completions need.
+    openai_client = AsyncOpenAI(timeout=Timeout(120.0, connect=5.0),
+                                max_retries=MAX_RETRIES)
+    set_default_openai_client(openai_client)
+    try:
+        failed = await run_batch(params, simulation_id, args.num_respondents)
+    finally:
+        await openai_client.close()
+        if _chart_pool is not None:
+            _chart_pool.shutdown()
+    if failed:
+        sys.exit(1) # Lets the UI mark the run as failed rather than completed
 
 if __name__ == "__main__":
     asyncio.run(main()) 
@@ -0,0 +1,144 @@
+import os
+import json
+import asyncio
+import hashlib
+import time
+from collections import OrderedDict
+from types import SimpleNamespace
+from typing import Any, Callable, Optional
+
+from agents import Agent, Runner
+from pydantic import BaseModel
+from openai.types.responses import ResponseTextDeltaEvent
+
+from env_config import env_number
+
+# Opt-in replay cache for development runs; set IDI_LLM_CACHE=1 to enable
+CACHE_ENABLED = os.getenv("IDI_LLM_CACHE") == "1"
+CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".llm_cache")
+# Entries older than this many days are treated as misses and re-fetched; 0 keeps them forever
+CACHE_TTL_DAYS = env_number("IDI_LLM_CACHE_TTL_DAYS", 0.0, cast=float, minimum=0)
+# In-process LRU layer over the disk cache, so repeated prompts within one run skip the file read
+MEMORY_CACHE_SIZE = 128
+_memory_cache: "OrderedDict[str, Any]" = OrderedDict()
+_cache_dir_ready = False # Set once CACHE_DIR exists, so later writes skip the makedirs syscalls
+
+
+def _remember(cache_file: str, final_output: Any) -> None:
+    _memory_cache[cache_file] = final_output
+    _memory_cache.move_to_end(cache_file)
+    if len(_memory_cache) > MEMORY_CACHE_SIZE:
+        _memory_cache.popitem(last=False)
+
+
+def cache_key(agent: Agent, prompt: str, variant: Optional[str] = None) -> str:
+    """
+    Hashes everything that determines an agent's response into a stable cache key.
+    variant separates calls that share a prompt but should get independent responses.
+    """
+    fields = {
+        "name": agent.name,
+        "model": str(agent.model),
+        "instructions": agent.instructions,
+        "prompt": prompt,
+    }
+    if variant is not None: # Keys without a variant stay the same as before
+        fields["variant"] = variant
+    payload = json.dumps(fields, sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _write_entry(cache_file: str, agent_name: str, final_output: Any) -> None:
+    """
+    Writes one cache entry to disk; runs in a worker thread. The entry is written to a temporary
+    file and moved into place, so a crash or a concurrent run never leaves a truncated entry.
+    """
+    global _cache_dir_ready
+    tmp_path = f"{cache_file}.{os.getpid()}.tmp" # Per process, so concurrent runs don't share one
+    try:
+        if not _cache_dir_ready:
+            os.makedirs(CACHE_DIR, exist_ok=True)
+            _cache_dir_ready = True
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"agent": agent_name, "final_output": final_output}, f)
+        os.replace(tmp_path, cache_file)
+    except OSError as e:
+        print(f"Warning: Could not write LLM cache entry {cache_file}: {e}")
+
+
+async def _store_entry(cache_file: str, agent: Agent, final_output: Any) -> None:
+    _remember(cache_file, final_output)
+    if isinstance(final_output, BaseModel):
+        final_output = final_output.model_dump()
+    await asyncio.to_thread(_write_entry, cache_file, agent.name, final_output)
+
+
+def _read_entry(cache_file: str, agent: Agent) -> Any:
+    """
+    Returns the cached final_output, or None on a miss, expired or unreadable entry.
+    Structured outputs are stored as plain dicts and re-validated into the agent's output_type.
+    """
+    if cache_file in _memory_cache:
+        _memory_cache.move_to_end(cache_file)
+        return _memory_cache[cache_file]
+    try:
+        if CACHE_TTL_DAYS > 0 and time.time() - os.path.getmtime(cache_file) > CACHE_TTL_DAYS * 86400:
+            return None
+        with open(cache_file, "r", encoding="utf-8") as f:
+            final_output = json.load(f)["final_output"]
+        if isinstance(agent.output_type, type) and issubclass(agent.output_type, BaseModel):
+            final_output = agent.output_type.model_validate(final_output)
+        _remember(cache_file, final_output)
+        return final_output
+    except FileNotFoundError:
+        return None
+    except (OSError, json.JSONDecodeError, KeyError, ValueError) as e:
+        print(f"Warning: Ignoring unreadable LLM cache entry {cache_file}: {e}")
+        return None
+
+
+async def cached_run(agent: Agent, prompt: str, *, cache_variant: Optional[str] = None,
+                     enabled: bool = CACHE_ENABLED) -> Any:
+    """
+    Drop-in replacement for Runner.run that replays responses from disk when caching is enabled.
+    Only the final_output is cached, so hits return a lightweight object exposing just that attribute.
+    cache_variant is folded into the cache key (see cache_key).
+    """
+    if not enabled:
+        return await Runner.run(agent, prompt)
+
+    cache_file = os.path.join(CACHE_DIR, f"{cache_key(agent, prompt, cache_variant)}.json")
+    cached_output = _read_entry(cache_file, agent)
+    if cached_output is not None:
+        return SimpleNamespace(final_output=cached_output)
+
+    result = await Runner.run(agent, prompt)
+    if isinstance(result.final_output, (str, BaseModel)):
+        await _store_entry(cache_file, agent, result.final_output)
+    return result
+
+
+async def cached_run_streamed(agent: Agent, prompt: str, on_delta: Callable[[str], None], *,
+                              previous_response_id: Optional[str] = None, enabled: bool = CACHE_ENABLED) -> Any:
+    """
+    Streaming counterpart of cached_run: feeds text deltas to on_delta as the model emits them
+    and returns the run result. Cache hits are replayed as a single delta and carry no
+    last_response_id. Calls continuing a server-side conversation via previous_response_id
+    depend on that conversation, not just the prompt, so they are never cached.
+    """
+    use_cache = enabled and previous_response_id is None
+    cache_file = os.path.join(CACHE_DIR, f"{cache_key(agent, prompt)}.json") if use_cache else None
+    if cache_file:
+        cached_output = _read_entry(cache_file, agent)
+        if cached_output is not None:
+            on_delta(cached_output)
+            return SimpleNamespace(final_output=cached_output, last_response_id=None)
+
+    result = Runner.run_streamed(agent, prompt, previous_response_id=previous_response_id)
+    async for event in result.stream_events():
+        if event.type == "raw_response_event" and isinstance(event.data, ResponseTextDeltaEvent):
+            on_delta(event.data.delta)
+
+    if cache_file and isinstance(result.final_output, str):
+        await _store_entry(cache_file, agent, result.final_output)
+    return result
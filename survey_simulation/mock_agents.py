@@ -2,31 +2,20 @@
 Mock Agent implementation for testing survey simulation functions.
 """
 
-from typing import Dict, Any, List
+import re
+import sys
+import copy
+import json
+import hashlib
+import logging
+from dataclasses import dataclass
+from typing import ClassVar, Dict, Any, List, get_origin
 
-class Agent:
-    """Mock version of Agent class for testing."""
-    
-    def __init__(self, name: str, instructions: str, model: str = "gpt-4o"):
-        self.name = name
-        self.instructions = instructions
-        self.model = model
-    
-    def generate(self, prompt: str) -> str:
-        """
-        Generate a mock response based on the agent type.
-        
-        Args:
-            prompt: The prompt to send to the agent
-            
-        Returns:
-            A mock response for testing
-        """
-        print(f"Mock Agent '{self.name}' processing prompt... (model: {self.model})")
-        
-        # Simple mock responses for testing different agent types
-        if self.name == "Survey Designer":
-            return '''```json
+logger = logging.getLogger(__name__)
+
+# Canned responses returned by the mock agents, built once at import time
+
+_SURVEY_DESIGNER_RESPONSE = '''```json
 {
   "survey_title": "Electric Vehicle Adoption Survey",
   "introduction": "Thank you for participating in our survey about electric vehicles. Your feedback will help us understand barriers to EV adoption.",
@@ -90,8 +79,8 @@ class Agent:
     }
   ]
 }```'''
-        elif self.name == "Respondent Generator":
-            return '''```json
+
+_RESPONDENT_GENERATOR_RESPONSE = '''```json
 [
   {
     "respondent_id": "R001",
@@ -160,8 +149,8 @@ class Agent:
     }
   }
 ]```'''
-        elif self.name in ["Survey Respondent", "Respondent"]:
-            return '''```json
+
+_RESPONDENT_RESPONSE = '''```json
 [
   {
     "question_id": "Q1",
@@ -188,8 +177,8 @@ class Agent:
     "response": "No"
   }
 ]```'''
-        elif self.name in ["Survey Analyst", "IDI Analyst", "Focus Group Analyst"]:
-            return '''This is an analysis response from the analyst agent.
+
+_ANALYST_RESPONSE = '''This is an analysis response from the analyst agent.
 
 Here are some key findings from the survey:
 1. Most respondents have some familiarity with EVs but have not driven one
@@ -209,11 +198,76 @@ Here are some key findings from the survey:
     {"theme": "Charging Infrastructure", "frequency": 4, "sentiment": "neutral", "description": "Questions about charging availability"}
   ]
 }```'''
-        else:
+
+# Fenced ```json block, the same pattern survey_simulation extracts responses with
+_FENCE_RE = re.compile(r'```json\s*(.*?)\s*```', re.DOTALL)
+
+def extract_json(text: str) -> str:
+    """Returns the body of the first ```json block in text, or the text itself if there is none."""
+    match = _FENCE_RE.search(text)
+    return match.group(1) if match else text
+
+# The same responses already parsed, keyed by response text. Callers get deep copies,
+# so mutating a returned payload never changes what later calls see.
+_PARSED_RESPONSES: Dict[str, Any] = {
+    response: json.loads(extract_json(response))
+    for response in (_SURVEY_DESIGNER_RESPONSE, _RESPONDENT_GENERATOR_RESPONSE, _RESPONDENT_RESPONSE, _ANALYST_RESPONSE)
+}
+
+class Agent:
+    """Mock version of Agent class for testing."""
+    # Fixed attribute layouts keep per-instance memory small when many respondent agents are created
+    __slots__ = ("name", "instructions", "model")
+
+    # Canned response per agent name; other names get a generic reply. Names are interned here
+    # and in __init__, so lookups match on identity instead of comparing characters.
+    _RESPONSES: ClassVar[Dict[str, str]] = {sys.intern(name): response for name, response in {
+        "Survey Designer": _SURVEY_DESIGNER_RESPONSE,
+        "Respondent Generator": _RESPONDENT_GENERATOR_RESPONSE,
+        "Survey Respondent": _RESPONDENT_RESPONSE,
+        "Respondent": _RESPONDENT_RESPONSE,
+        "Survey Analyst": _ANALYST_RESPONSE,
+        "IDI Analyst": _ANALYST_RESPONSE,
+        "Focus Group Analyst": _ANALYST_RESPONSE,
+    }.items()}
+    
+    def __init__(self, name: str, instructions: str, model: str = "gpt-4o"):
+        self.name = sys.intern(name)
+        self.instructions = instructions
+        self.model = model
+    
+    def generate(self, prompt: str) -> str:
+        """
+        Generate a mock response based on the agent type.
+        
+        Args:
+            prompt: The prompt to send to the agent
+            
+        Returns:
+            A mock response for testing
+        """
+        # Checked first so that nothing is formatted when debug logging is off
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Mock Agent '%s' processing prompt... (model: %s)", self.name, self.model)
+        
+        # Simple mock responses for testing different agent types
+        response = self._RESPONSES.get(self.name)
+        if response is None:
             return f"This is a mock response from the {self.name} agent. In a real implementation, this would be the output from the OpenAI API."
+        return response
+
+    def generate_parsed(self, prompt: str) -> Any:
+        """
+        Like generate, but returns a fresh copy of the response's JSON payload, parsed once at import.
+        Agents without a JSON response get the plain text reply.
+        """
+        response = self.generate(prompt)
+        parsed = _PARSED_RESPONSES.get(response)
+        return response if parsed is None else copy.deepcopy(parsed)
 
 class SurveyDesignerAgent(Agent):
     """Mock implementation of SurveyDesignerAgent."""
+    __slots__ = ("topic", "research_objectives", "target_audience")
     def __init__(self, topic: str, research_objectives: str, target_audience: str):
         super().__init__(
             name="Survey Designer",
@@ -226,6 +280,7 @@ class SurveyDesignerAgent(Agent):
 
 class RespondentGeneratorAgent(Agent):
     """Mock implementation of RespondentGeneratorAgent."""
+    __slots__ = ("target_audience", "num_respondents")
     def __init__(self, target_audience: str, num_respondents: int = 5):
         super().__init__(
             name="Respondent Generator",
@@ -237,6 +292,7 @@ class RespondentGeneratorAgent(Agent):
 
 class SurveyResponseAgent(Agent):
     """Mock implementation of SurveyResponseAgent."""
+    __slots__ = ("survey_data", "respondent_data", "topic")
     def __init__(self, survey_data: Dict[str, Any], respondent_data: Dict[str, Any], topic: str):
         super().__init__(
             name="Survey Respondent",
@@ -249,6 +305,7 @@ class SurveyResponseAgent(Agent):
 
 class SurveyAnalystAgent(Agent):
     """Mock implementation of SurveyAnalystAgent."""
+    __slots__ = ("topic", "research_objectives", "target_audience")
     def __init__(self, topic: str, research_objectives: str, target_audience: str):
         super().__init__(
             name="Survey Analyst",
@@ -259,24 +316,72 @@ class SurveyAnalystAgent(Agent):
         self.research_objectives = research_objectives
         self.target_audience = target_audience
 
+def _is_instance(value: Any, output_type: Any) -> bool:
+    """isinstance that also accepts typing generics such as List[Dict[str, Any]], checked by their origin."""
+    origin = get_origin(output_type) or output_type
+    return isinstance(origin, type) and isinstance(value, origin)
+
+@dataclass(slots=True)
+class _MockResult:
+    """Result object returned by the mock Runner."""
+    final_output: str
+
+    def final_output_as(self, output_type):
+        # Canned JSON responses are already parsed; anything else is parsed from its ```json block
+        parsed = _PARSED_RESPONSES.get(self.final_output)
+        structured = (get_origin(output_type) or output_type) in (dict, list) or hasattr(output_type, "model_validate")
+        if parsed is not None:
+            parsed = copy.deepcopy(parsed)
+        elif structured:
+            try:
+                parsed = json.loads(extract_json(self.final_output))
+            except ValueError:
+                parsed = None
+        if parsed is not None:
+            if _is_instance(parsed, output_type):
+                return parsed
+            # Pydantic output types, without importing pydantic into the mocks
+            if isinstance(parsed, dict) and hasattr(output_type, "model_validate"):
+                return output_type.model_validate(parsed)
+        # This would normally convert to the output type
+        return {"result": self.final_output}
+
+# Exact-match response cache for Runner.run, keyed by everything that determines a response
+_RESPONSE_CACHE: Dict[str, str] = {}
+_CACHE_STATS = {"hits": 0, "misses": 0}
+
 # Mock Runner class
 class Runner:
     """Mock implementation of Runner for testing."""
+
+    @staticmethod
+    def cache_key(agent, prompt: str) -> str:
+        """Hashes the agent's model, name and instructions with the prompt into a stable cache key."""
+        payload = "\0".join((str(agent.model), agent.name, agent.instructions, prompt))
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
     
     @staticmethod
     async def run(agent, prompt, context=None):
         """
         Mock run method that returns a result object with the agent's response.
+        Repeated (agent, prompt) pairs are answered from the response cache without calling generate.
         """
-        response = agent.generate(prompt)
-        
-        # Create a simple result object
-        class Result:
-            def __init__(self, output):
-                self.final_output = output
-                
-            def final_output_as(self, output_type):
-                # This would normally convert to the output type
-                return {"result": self.final_output}
-        
-        return Result(response) 
\ No newline at end of file
+        key = Runner.cache_key(agent, prompt)
+        response = _RESPONSE_CACHE.get(key)
+        if response is None:
+            _CACHE_STATS["misses"] += 1
+            response = _RESPONSE_CACHE[key] = agent.generate(prompt)
+        else:
+            _CACHE_STATS["hits"] += 1
+        return _MockResult(response)
+
+    @staticmethod
+    def clear_cache() -> None:
+        """Empties the response cache and resets its hit/miss counters."""
+        _RESPONSE_CACHE.clear()
+        _CACHE_STATS.update(hits=0, misses=0)
+
+    @staticmethod
+    def cache_stats() -> Dict[str, int]:
+        """Returns the response cache's hit and miss counts."""
+        return dict(_CACHE_STATS) 
\ No newline at end of file